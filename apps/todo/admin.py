@@ -1,10 +1,64 @@
 from django.contrib import admin
-from .models import Task
+from django.contrib.postgres.search import SearchQuery
+from django.db import transaction
+from django.db.models import Q
+
+from .cache import bump_version
+from .models import Task, TaskTombstone
+from .search import SEARCH_CONFIG, is_postgres
+from .stats import STATE_FIELDS, add_change, adjust_task_stats, get_state, move_task_stats
 
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
     list_display = ('id', 'title', 'author', 'important', 'is_completed')
     search_fields = ('title', 'author__username')
-    readonly_fields = ('created_time', 'updated_time')
+    readonly_fields = ('created_time', 'updated_time', 'completed_time')
     list_filter = ('is_completed',)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not is_postgres():
+            return super().get_search_results(request, queryset, search_term)
+        query = SearchQuery(search_term, config=SEARCH_CONFIG, search_type='websearch')
+        return queryset.filter(Q(search_vector=query) | Q(author__username=search_term)), False
+
+    def save_model(self, request, obj, form, change):
+        old_author_id, state = obj.author_id, None
+        if change:
+            # locked, so a concurrent completion can't be counted twice (the
+            # admin runs save_model in a transaction)
+            old_author_id, *state = Task.objects.select_for_update().filter(pk=obj.pk) \
+                .values_list('author_id', *STATE_FIELDS).get()
+        super().save_model(request, obj, form, change)
+        if old_author_id != obj.author_id:
+            # gone from the old author's lists, their sync clients drop it
+            TaskTombstone.record(old_author_id, [obj.pk])
+            move_task_stats(old_author_id, state, None)
+            move_task_stats(obj.author_id, None, get_state(obj))
+            bump_version(old_author_id)
+        else:
+            move_task_stats(obj.author_id, state, get_state(obj))
+        bump_version(obj.author_id)
+
+    def delete_model(self, request, obj):
+        pk = obj.pk
+        state = Task.objects.select_for_update().filter(pk=pk).values_list(*STATE_FIELDS).get()
+        super().delete_model(request, obj)
+        TaskTombstone.record(obj.author_id, [pk])
+        move_task_stats(obj.author_id, state, None)
+        bump_version(obj.author_id)
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        # actions don't run in a transaction of their own, unlike save_model and delete_model
+        deleted = {}
+        for pk, author_id, *state in queryset.select_for_update().values_list('id', 'author_id', *STATE_FIELDS):
+            deleted.setdefault(author_id, []).append((pk, state))
+        super().delete_queryset(request, queryset)
+        for author_id, tasks in deleted.items():
+            TaskTombstone.record(author_id, [pk for pk, _ in tasks])
+            deltas = {}
+            for _, state in tasks:
+                add_change(deltas, state, None)
+            adjust_task_stats(author_id, deltas)
+            bump_version(author_id)
@@ -0,0 +1,266 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from apps.todo.cache import aincr_version
+from apps.todo.fieldsets import DETAIL_FIELDS, LIST_FIELDS, get_fields, select_fields
+from apps.todo.stats import aget_task_stats, get_state, move_task_stats, STATE_FIELDS
+from apps.todo.models import Task, TaskTombstone
+from apps.todo.serializers import TaskSerializer, TaskListSerializer, TaskBulkSerializer
+from apps.users.authentication import aauthenticate
+from apps.users.serializers import UserSerializer
+from shared.pagination import CustomPagination
+
+# Async variants of the task endpoints in apps.todo.views for the ASGI entry
+# point, using the async ORM so a request never hops through a worker thread.
+# There is no atomic() in async code, so every write runs in one sync_to_async
+# transaction with its aggregates update, with the row locked when the task
+# is read first.
+
+
+@sync_to_async
+def create_task(user, data):
+    with transaction.atomic():
+        task = Task.objects.create(author=user, **data)
+        move_task_stats(user.id, None, get_state(task))
+    return task
+
+
+@sync_to_async
+def complete_task(user, pk):
+    """
+    Completes the user's task ``pk`` like apps.todo.views.ToCompleteAPIView.
+    Returns False when there is no such task.
+    """
+    tasks = Task.objects.filter(id=pk, author=user)
+    now = timezone.now()
+    with transaction.atomic():
+        # important doesn't change here, so it's left out of the states
+        if tasks.filter(is_completed=False).update(is_completed=True, completed_time=now, updated_time=now):
+            move_task_stats(user.id, (False, False, None), (True, False, now))
+        elif tasks.filter(is_completed__isnull=True).update(is_completed=True, completed_time=now, updated_time=now):
+            move_task_stats(user.id, (None, False, None), (True, False, now))
+        elif not tasks.exists():
+            return False
+    return True
+
+
+@sync_to_async
+def update_task(user, pk, data, partial):
+    """
+    Validates ``data`` and applies it to the user's task ``pk``, with the row
+    locked and the aggregates moved in the same transaction. Returns the task
+    (None when not found) and the validation errors.
+    """
+    with transaction.atomic():
+        task = Task.objects.select_for_update(of=('self',)).select_related('author').defer('search_vector') \
+            .filter(id=pk, author=user).first()
+        if task is None:
+            return None, None
+        serializer = TaskBulkSerializer(data=data, partial=partial)
+        if not serializer.is_valid():
+            return task, serializer.errors
+        state = get_state(task)
+        for field, value in serializer.validated_data.items():
+            setattr(task, field, value)
+        task.save(update_fields=[*serializer.validated_data, 'updated_time'])
+        move_task_stats(user.id, state, get_state(task))
+    return task, None
+
+
+@sync_to_async
+def delete_task(user, pk):
+    """
+    Deletes the user's task ``pk`` with its tombstone and aggregates in one
+    transaction. Returns False when there is no such task.
+    """
+    tasks = Task.objects.filter(id=pk, author=user)
+    with transaction.atomic():
+        state = tasks.select_for_update().values_list(*STATE_FIELDS).first()
+        if state is None:
+            return False
+        tasks.delete()
+        TaskTombstone.record(user.id, [pk])
+        move_task_stats(user.id, state, None)
+    return True
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAPIView(View):
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await aauthenticate(request)
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+    def get_json(self):
+        try:
+            data = json.loads(self.request.body or b'{}')
+        except ValueError:
+            data = None
+        return data if isinstance(data, dict) else {}
+
+    @staticmethod
+    def not_found():
+        return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    @staticmethod
+    def invalid(errors):
+        return JsonResponse(errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncTaskListView(AsyncAPIView):
+    is_completed = None
+
+    async def get(self, request):
+        user = request.user
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+            page_size = min(max(int(request.GET.get('page_size', CustomPagination.page_size)), 1),
+                            CustomPagination.max_page_size)
+        except ValueError:
+            return self.not_found()
+        try:
+            fields = get_fields(request.GET, LIST_FIELDS)
+        except ValidationError as exc:
+            return self.invalid(exc.detail)
+        stats = await aget_task_stats(user.id)
+        count = stats.completed if self.is_completed else stats.current
+        offset = (page - 1) * page_size
+        tasks = select_fields(Task.objects.filter(author=user, is_completed=self.is_completed), fields) \
+            .order_by('created_time', 'id')
+        page_obj = [task async for task in tasks[offset:offset + page_size]]
+        url = request.build_absolute_uri()
+        next_link = replace_query_param(url, 'page', page + 1) if offset + page_size < count else None
+        previous_link = None
+        if page == 2:
+            previous_link = remove_query_param(url, 'page')
+        elif page > 2:
+            previous_link = replace_query_param(url, 'page', page - 1)
+        return JsonResponse(
+            {
+                'links': {
+                    'next': next_link,
+                    'previous': previous_link
+                },
+                'count': count,
+                'results': TaskListSerializer(page_obj, many=True, fields=fields).data,
+                'author': UserSerializer(user).data,
+            }
+        )
+
+
+class AsyncCurrentTaskListView(AsyncTaskListView):
+    is_completed = False
+
+
+class AsyncCompletedTaskListView(AsyncTaskListView):
+    is_completed = True
+
+
+class AsyncTaskDetailView(AsyncAPIView):
+
+    async def get(self, request, pk):
+        try:
+            fields = get_fields(request.GET, DETAIL_FIELDS)
+        except ValidationError as exc:
+            return self.invalid(exc.detail)
+        task = await select_fields(Task.objects.filter(id=pk, author=request.user), fields).afirst()
+        if task is None:
+            return self.not_found()
+        return JsonResponse(
+            {
+                'success': True,
+                'data': TaskSerializer(task, fields=fields).data,
+                'status': status.HTTP_200_OK
+            }
+        )
+
+
+class AsyncTaskCreateView(AsyncAPIView):
+
+    async def post(self, request):
+        user = request.user
+        serializer = TaskBulkSerializer(data=self.get_json())
+        if not serializer.is_valid():
+            return self.invalid(serializer.errors)
+        task = await create_task(user, serializer.validated_data)
+        await aincr_version(user.id)
+        return JsonResponse(
+            {
+                'success': True,
+                'data': TaskSerializer(task).data,
+                'status': status.HTTP_200_OK
+            }
+        )
+
+
+class AsyncTaskUpdateView(AsyncAPIView):
+
+    async def put(self, request, pk):
+        return await self.update(request, pk, partial=False)
+
+    async def patch(self, request, pk):
+        return await self.update(request, pk, partial=True)
+
+    async def update(self, request, pk, partial):
+        user = request.user
+        task, errors = await update_task(user, pk, self.get_json(), partial)
+        if task is None:
+            return self.not_found()
+        if errors:
+            return self.invalid(errors)
+        await aincr_version(user.id)
+        return JsonResponse(
+            {
+                'success': True,
+                'data': TaskSerializer(task).data,
+                'status': status.HTTP_200_OK
+            }
+        )
+
+
+class AsyncToCompleteView(AsyncAPIView):
+
+    async def post(self, request, pk):
+        user = request.user
+        if not await complete_task(user, pk):
+            return self.not_found()
+        await aincr_version(user.id)
+        return JsonResponse(
+            {
+                'success': True,
+                'detail': 'Your task successfully completed',
+                'status': status.HTTP_200_OK
+            }
+        )
+
+
+class AsyncTaskDeleteView(AsyncAPIView):
+
+    async def delete(self, request, pk):
+        user = request.user
+        if not await delete_task(user, pk):
+            return self.not_found()
+        await aincr_version(user.id)
+        return JsonResponse(
+            {
+                'success': True,
+                'detail': 'You successfully deleted your task',
+                'status': status.HTTP_200_OK
+            }
+        )
@@ -0,0 +1,98 @@
+import hashlib
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+VERSION_KEY = 'todo:version:{user_id}'
+RESPONSE_KEY = 'todo:response:{user_id}:{version}:{part}:{digest}'
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.TODO_CACHE_ALIAS]
+
+
+def get_version(user_id):
+    """
+    Current cache version of the user's tasks. A missing (or evicted) counter
+    restarts from the clock, so it never falls back onto an older version.
+    """
+    cache = get_cache()
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def incr_version(user_id):
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY.format(user_id=user_id))
+    except ValueError:
+        get_version(user_id)
+
+
+async def aget_version(user_id):
+    cache = get_cache()
+    key = VERSION_KEY.format(user_id=user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+async def aincr_version(user_id):
+    cache = get_cache()
+    try:
+        await cache.aincr(VERSION_KEY.format(user_id=user_id))
+    except ValueError:
+        await aget_version(user_id)
+
+
+def bump_version(user_id):
+    """
+    Invalidates every cached response of the user. Inside a transaction the
+    bump waits for the commit, so no reader can cache the old rows again.
+    """
+    transaction.on_commit(partial(incr_version, user_id))
+
+
+def _record(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def get_cached_data(request, build, part='body', key=None):
+    """
+    Returns the response data for the request from the cache, keyed by user,
+    version and ``key`` (the full request URL by default), calling ``build``
+    on a miss. With TODO_CACHE_TIMEOUT at 0 it always calls ``build``.
+    """
+    if not settings.TODO_CACHE_TIMEOUT:
+        return build()
+    user_id = request.user.id
+    digest = hashlib.md5((key or request.build_absolute_uri()).encode()).hexdigest()
+    key = RESPONSE_KEY.format(user_id=user_id, version=get_version(user_id), part=part, digest=digest)
+    cache = get_cache()
+    data = cache.get(key)
+    if data is not None:
+        _record('hits')
+        return data
+    _record('misses')
+    data = build()
+    cache.set(key, data, timeout=settings.TODO_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+@register()
+def check_todo_cache(app_configs, **kwargs):
+    """
+    A task write only bumps the user's version in TODO_CACHE_ALIAS, so caching
+    responses needs a cache every process shares.
+    """
+    if settings.TODO_CACHE_TIMEOUT and isinstance(caches[settings.TODO_CACHE_ALIAS], LocMemCache):
+        return [
+            Error(
+                'TODO_CACHE_TIMEOUT needs a cache shared by all processes, '
+                f'the {settings.TODO_CACHE_ALIAS!r} cache is per process.',
+                hint='Set REDIS_URL, or TODO_CACHE_TIMEOUT=0 to turn the response cache off.',
+                id='todo.E001',
+            )
+        ]
+    return []
@@ -0,0 +1,54 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from apps.todo.cache import get_cached_data
+from apps.users.serializers import UserSerializer
+
+
+def get_validators(request, queryset, scope, count=None):
+    """
+    Returns the ETag and Last-Modified timestamp of the tasks in the queryset,
+    derived from their count and latest ``updated_time``, plus the user shown
+    as the author. The state is cached per user, version and ``scope``, so
+    every page and fields variant of a list shares one aggregate. ``count``
+    returns the number of tasks when it is known without counting them.
+    """
+
+    def build():
+        if count is None:
+            state = queryset.aggregate(last_modified=Max('updated_time'), count=Count('id'))
+        else:
+            state = queryset.aggregate(last_modified=Max('updated_time'))
+            state['count'] = count()
+        last_modified = state['last_modified']
+        if not state['count'] or last_modified is None:
+            return 0, None, None
+        author = UserSerializer(request.user).data
+        return state['count'], last_modified, ':'.join(str(value) for value in author.values())
+
+    total, last_modified, author = get_cached_data(request, build, part='validators', key=scope)
+    if not total:
+        return None, None
+    source = f'{request.build_absolute_uri()}:{total}:{last_modified.isoformat()}:{author}'
+    return quote_etag(hashlib.md5(source.encode()).hexdigest()), int(last_modified.timestamp())
+
+
+def get_not_modified_response(request, etag, last_modified=None):
+    """
+    Returns a 304 response when the client's If-None-Match/If-Modified-Since
+    headers still match, otherwise None.
+    """
+    if etag is None:
+        return None
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified=None):
+    if etag is not None:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,72 @@
+import csv
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.todo.models import Task
+
+EXPORT_FIELDS = ('id', 'title', 'memo', 'important', 'is_completed', 'created_time', 'updated_time',
+                 'completed_time')
+# Rows are joined into chunks of about this size before they are sent
+CHUNK_BYTES = 64 * 1024
+
+
+class Echo:
+    """
+    File-like object for csv.writer that hands the written line back.
+    """
+
+    def write(self, value):
+        return value
+
+
+def get_rows(user, chunk_size):
+    """
+    Streams the user's tasks from a server-side cursor, ``chunk_size`` rows
+    per fetch, without caching them on the queryset.
+    """
+    return Task.objects.filter(author=user).order_by('id') \
+        .values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(EXPORT_FIELDS, row))) + '\n'
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def encode_chunks(lines):
+    chunk = []
+    size = 0
+    for line in lines:
+        line = line.encode()
+        chunk.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield b''.join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield b''.join(chunk)
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+EXPORT_FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
@@ -0,0 +1,46 @@
+from django.db.models.functions import Left
+from rest_framework.exceptions import ValidationError
+
+# Sparse fieldsets: ``?fields=id,title,is_completed`` picks the fields of each
+# task, ``?memo_preview=true`` swaps the memo for its first characters, cut
+# by the database so the full memo is never loaded.
+
+MEMO_PREVIEW_LENGTH = 100
+LIST_FIELDS = ('id', 'title', 'memo', 'important', 'is_completed', 'created_time', 'updated_time', 'completed_time')
+DETAIL_FIELDS = (*LIST_FIELDS, 'author')
+
+
+def get_fields(query_params, default):
+    """
+    Returns the task fields asked for, ``default`` when there is no ``fields``
+    parameter. Any of ``default`` and memo_preview can be asked for.
+    """
+    value = query_params.get('fields')
+    if value:
+        fields = [name for name in dict.fromkeys(name.strip() for name in value.split(',')) if name]
+        unknown = [name for name in fields if name not in default and name != 'memo_preview']
+        if unknown or not fields:
+            raise ValidationError(
+                {
+                    'success': False,
+                    'detail': f"fields must be some of: {', '.join((*default, 'memo_preview'))}"
+                }
+            )
+    else:
+        fields = list(default)
+    if query_params.get('memo_preview') == 'true' and 'memo' in fields:
+        fields[fields.index('memo')] = 'memo_preview'
+    return fields
+
+
+def select_fields(queryset, fields, extra=()):
+    """
+    Loads only the columns ``fields`` need, plus the ``extra`` ones read
+    outside the serializer (e.g. by cursor pagination).
+    """
+    columns = [name for name in fields if name != 'memo_preview'] + list(extra)
+    if 'author' in fields:
+        queryset = queryset.select_related('author')
+    if 'memo_preview' in fields:
+        queryset = queryset.annotate(memo_preview=Left('memo', MEMO_PREVIEW_LENGTH))
+    return queryset.only(*columns)
@@ -0,0 +1,129 @@
+import csv
+import json
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.todo.cache import bump_version
+from apps.todo.stats import add_change, adjust_task_stats, get_state
+from apps.todo.models import Task
+
+TITLE_MAX_LENGTH = Task._meta.get_field('title').max_length
+BOOLEAN_FIELDS = ('important', 'is_completed')
+CSV_BOOLEANS = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False, '': False}
+# Only the first errors are reported, the rest are counted
+MAX_REPORTED_ERRORS = 1000
+
+
+def parse_ndjson(lines):
+    """
+    Yields (line number, row, error) for every non-blank line.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None, 'Invalid JSON'
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, 'Expected a JSON object'
+            continue
+        yield line_number, row, None
+
+
+def parse_csv(lines):
+    reader = csv.DictReader(lines)
+    for row in reader:
+        for field in BOOLEAN_FIELDS:
+            value = row.get(field)
+            if isinstance(value, str) and value.strip().lower() in CSV_BOOLEANS:
+                row[field] = CSV_BOOLEANS[value.strip().lower()]
+        yield reader.line_num, row, None
+
+
+PARSERS = {
+    'ndjson': parse_ndjson,
+    'csv': parse_csv,
+}
+
+
+def validate_row(row):
+    """
+    Checks a row the way TaskSerializer would for the imported fields, without
+    the serializer machinery. Returns (Task field values, errors).
+    completed_time is read-only in the API but kept here, so an export keeps
+    its completion dates when it is imported again.
+    """
+    errors = {}
+    values = {}
+    for field in ('title', 'memo'):
+        value = row.get(field)
+        if not isinstance(value, str) or not value.strip():
+            errors[field] = 'This field is required.'
+        else:
+            values[field] = value
+    if 'title' in values and len(values['title']) > TITLE_MAX_LENGTH:
+        errors['title'] = f'Ensure this field has no more than {TITLE_MAX_LENGTH} characters.'
+    for field in BOOLEAN_FIELDS:
+        value = row.get(field, False)
+        if value is not None and not isinstance(value, bool):
+            errors[field] = 'Must be a valid boolean.'
+        else:
+            values[field] = value
+    value = row.get('completed_time')
+    if value not in (None, ''):
+        try:
+            completed_time = parse_datetime(value) if isinstance(value, str) else None
+        except ValueError:
+            completed_time = None
+        if completed_time is None:
+            errors['completed_time'] = 'Datetime has wrong format.'
+        else:
+            if timezone.is_naive(completed_time):
+                completed_time = timezone.make_aware(completed_time)
+            values['completed_time'] = completed_time
+    return values, errors
+
+
+def import_tasks(user_id, lines, input_format, batch_size):
+    """
+    Parses ``lines`` incrementally and inserts the valid rows with bulk_create,
+    ``batch_size`` at a time, in one transaction.
+    """
+    parse = PARSERS[input_format]
+    created = 0
+    error_count = 0
+    errors = []
+    deltas = {}
+    batch = []
+    now = timezone.now()
+    with transaction.atomic():
+        for line_number, row, error in parse(lines):
+            if error is None:
+                values, error = validate_row(row)
+            if error:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'line': line_number, 'errors': error})
+                continue
+            task = Task(author_id=user_id, **values)
+            task.update_completed_time(now)
+            batch.append(task)
+            add_change(deltas, None, get_state(task))
+            if len(batch) >= batch_size:
+                Task.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            Task.objects.bulk_create(batch)
+            created += len(batch)
+        adjust_task_stats(user_id, deltas)
+        bump_version(user_id)
+    return {
+        'created': created,
+        'error_count': error_count,
+        'errors': errors,
+    }
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.todo.models import TaskTombstone
+
+
+class Command(BaseCommand):
+    help = 'Deletes task tombstones older than TODO_TOMBSTONE_RETENTION_DAYS, run it periodically (e.g. daily cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        expired = TaskTombstone.objects.filter(
+            deleted_time__lt=timezone.now() - timedelta(days=settings.TODO_TOMBSTONE_RETENTION_DAYS)
+        )
+        total = 0
+        while True:
+            ids = list(expired.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            total += TaskTombstone.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Deleted {total} task tombstones'))
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.todo.importer import PARSERS, import_tasks
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Imports tasks for a user from an NDJSON or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_id', type=int)
+        parser.add_argument('path')
+        parser.add_argument('--input', choices=PARSERS, help='File format, taken from the file extension by default')
+        parser.add_argument('--batch-size', type=int, default=settings.TODO_IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if not User.objects.filter(id=options['user_id']).exists():
+            raise CommandError('User not found')
+        input_format = options['input'] or options['path'].rsplit('.', 1)[-1].lower()
+        if input_format not in PARSERS:
+            raise CommandError(f"Unknown file format, use --input {'/'.join(PARSERS)}")
+        with open(options['path'], encoding='utf-8-sig', newline='') as file:
+            result = import_tasks(options['user_id'], file, input_format, options['batch_size'])
+        for error in result['errors']:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} tasks, {result['error_count']} lines rejected"
+        ))
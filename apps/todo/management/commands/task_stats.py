@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.todo.cache import bump_version
+from apps.todo.models import TaskStats
+from apps.todo.stats import rebuild_task_stats, verify_task_stats
+
+
+class Command(BaseCommand):
+    help = 'Verifies or rebuilds the maintained task aggregates against the tasks table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=('verify', 'rebuild'))
+        parser.add_argument('--user', type=int, help='only this user id')
+
+    def handle(self, *args, **options):
+        user_ids = get_user_model().objects.values_list('id', flat=True).order_by('id')
+        if options['user'] is not None:
+            user_ids = user_ids.filter(id=options['user'])
+            if not user_ids.exists():
+                raise CommandError(f"User {options['user']} does not exist")
+        if options['action'] == 'rebuild':
+            total = 0
+            for user_id in user_ids.iterator():
+                with transaction.atomic():
+                    # waits for in-flight task writes of the user to commit
+                    list(TaskStats.objects.select_for_update().filter(user_id=user_id))
+                    rebuild_task_stats(user_id)
+                    bump_version(user_id)
+                total += 1
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt task stats of {total} users'))
+            return
+        drifted = 0
+        for user_id in user_ids.iterator():
+            differences = verify_task_stats(user_id)
+            if differences:
+                drifted += 1
+                for name, (stored, actual) in sorted(differences.items()):
+                    self.stdout.write(f'user {user_id}: {name} stored={stored} actual={actual}')
+        if drifted:
+            raise CommandError(f'Task stats of {drifted} users have drifted, run "task_stats rebuild"')
+        self.stdout.write(self.style.SUCCESS('Task stats are up to date'))
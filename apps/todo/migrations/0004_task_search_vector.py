@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:20
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_INDEX = django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_search_vector_idx')
+
+CREATE_TRIGGER = """
+CREATE FUNCTION todo_task_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.simple', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.simple', coalesce(NEW.memo, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER todo_task_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, memo ON todo_task
+    FOR EACH ROW EXECUTE FUNCTION todo_task_search_vector_update();
+
+UPDATE todo_task SET title = title;
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS todo_task_search_vector_trigger ON todo_task;
+DROP FUNCTION IF EXISTS todo_task_search_vector_update();
+"""
+
+
+def create_search_index(apps, schema_editor):
+    # The GIN index and the trigger are Postgres only, other databases
+    # search through apps.todo.search.InvertedIndex
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.add_index(apps.get_model('todo', 'Task'), SEARCH_INDEX)
+    schema_editor.execute(CREATE_TRIGGER)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(DROP_TRIGGER)
+    schema_editor.remove_index(apps.get_model('todo', 'Task'), SEARCH_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0003_tasktombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='task',
+                    index=SEARCH_INDEX,
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_index, drop_search_index),
+            ],
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+import django.db.models.deletion
+
+
+def backfill_completed_time(apps, schema_editor):
+    Task = apps.get_model('todo', 'Task')
+    Task.objects.filter(is_completed=True).update(completed_time=F('updated_time'))
+
+
+def reset_task_stats(apps, schema_editor):
+    # Rows without the new aggregates are rebuilt on first use
+    apps.get_model('todo', 'TaskStats').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('todo', '0005_taskcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='completed_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_completed_time, migrations.RunPython.noop),
+        migrations.RenameModel(
+            old_name='TaskCounter',
+            new_name='TaskStats',
+        ),
+        migrations.AlterField(
+            model_name='taskstats',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_stats', serialize=False, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='taskstats',
+            name='important',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='taskstats',
+            name='total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(reset_task_stats, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='TaskDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('completed', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='taskdailystats',
+            constraint=models.UniqueConstraint(fields=('user', 'day'), name='task_daily_stats_user_day_unique'),
+        ),
+    ]
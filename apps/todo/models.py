@@ -1,4 +1,7 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 
 from apps.users.models import User
 
@@ -11,6 +14,88 @@ class Task(models.Model):
     is_completed = models.BooleanField(default=False, null=True, blank=True)
     created_time = models.DateTimeField(auto_now_add=True)
     updated_time = models.DateTimeField(auto_now=True)
+    completed_time = models.DateTimeField(null=True, blank=True)
+    # Filled in by a database trigger on Postgres, see migration 0004
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', 'is_completed', 'created_time', 'id'], name='task_author_completed_idx'),
+            models.Index(fields=['author', 'updated_time'], name='task_author_updated_idx'),
+            GinIndex(fields=['search_vector'], name='task_search_vector_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        self.update_completed_time()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'is_completed' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'completed_time'}
+        super(Task, self).save(*args, **kwargs)
+
+    def update_completed_time(self, now=None):
+        """
+        Keeps completed_time in line with is_completed, call it before writes
+        that bypass save() (bulk_create/bulk_update).
+        """
+        if not self.is_completed:
+            self.completed_time = None
+        elif self.completed_time is None:
+            self.completed_time = now or timezone.now()
+
+
+class TaskTombstone(models.Model):
+    """
+    Remembers deleted tasks for a while, so delta sync can tell clients about them.
+    """
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_tombstones')
+    task_id = models.BigIntegerField()
+    deleted_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', 'deleted_time'], name='tombstone_author_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.task_id)
+
+    @staticmethod
+    def record(author_id, task_ids):
+        TaskTombstone.objects.bulk_create(
+            [TaskTombstone(author_id=author_id, task_id=task_id) for task_id in task_ids]
+        )
+
+
+class TaskStats(models.Model):
+    """
+    Per-user task aggregates kept up to date by the task write paths, so
+    pagination and the stats endpoint don't need a COUNT(*) per request.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='task_stats')
+    total = models.PositiveIntegerField(default=0)
+    current = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    important = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.current}/{self.completed}"
+
+
+class TaskDailyStats(models.Model):
+    """
+    Number of the user's tasks completed on each day.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_daily_stats')
+    day = models.DateField()
+    completed = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='task_daily_stats_user_day_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.day}: {self.completed}"
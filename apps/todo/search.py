@@ -0,0 +1,93 @@
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+
+from apps.todo.cache import get_version
+from apps.todo.models import Task
+
+SEARCH_CONFIG = 'simple'
+# Mirrors the A/B weights the database trigger gives title and memo
+TITLE_WEIGHT, MEMO_WEIGHT = 1.0, 0.4
+MAX_INDEXES = 128
+
+token_re = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return token_re.findall(text.lower())
+
+
+def is_postgres():
+    return connection.vendor == 'postgresql'
+
+
+class InvertedIndex:
+    """
+    In-process token -> {task id: score} index of one user's tasks, used where
+    Postgres full-text search is not available (SQLite test and benchmark runs).
+    """
+
+    def __init__(self, rows):
+        self.postings = defaultdict(dict)
+        for pk, title, memo in rows:
+            for weight, text in ((TITLE_WEIGHT, title), (MEMO_WEIGHT, memo)):
+                for token in tokenize(text or ''):
+                    postings = self.postings[token]
+                    postings[pk] = postings.get(pk, 0) + weight
+
+    def search(self, q):
+        """
+        Returns {task id: rank} of the tasks containing every token of ``q``.
+        """
+        tokens = set(tokenize(q))
+        if not tokens:
+            return {}
+        postings = [self.postings.get(token, {}) for token in tokens]
+        ids = set.intersection(*(set(p) for p in postings))
+        return {pk: sum(p[pk] for p in postings) for pk in ids}
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_inverted_index(user_id):
+    """
+    Returns the user's index, rebuilt whenever their task cache version moves.
+    """
+    version = get_version(user_id)
+    with _indexes_lock:
+        entry = _indexes.get(user_id)
+        if entry is not None and entry[0] == version:
+            _indexes.move_to_end(user_id)
+            return entry[1]
+    index = InvertedIndex(Task.objects.filter(author_id=user_id).values_list('id', 'title', 'memo').iterator())
+    with _indexes_lock:
+        _indexes[user_id] = (version, index)
+        _indexes.move_to_end(user_id)
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def search_tasks(user, q):
+    """
+    Returns the user's tasks matching ``q`` annotated with ``rank``.
+    """
+    tasks = Task.objects.filter(author=user)
+    if is_postgres():
+        query = SearchQuery(q, config=SEARCH_CONFIG, search_type='websearch')
+        # real -> double precision, so rank values survive the cursor round trip
+        return tasks.filter(search_vector=query) \
+            .annotate(rank=Cast(SearchRank(F('search_vector'), query), FloatField()))
+    ranks = get_inverted_index(user.id).search(q)
+    if not ranks:
+        return tasks.none().annotate(rank=Value(0.0, output_field=FloatField()))
+    return tasks.filter(id__in=ranks).annotate(
+        rank=Case(*[When(id=pk, then=Value(rank)) for pk, rank in ranks.items()], output_field=FloatField())
+    )
@@ -1,16 +1,31 @@
 from rest_framework import serializers
 
+from apps.todo.fieldsets import LIST_FIELDS
 from apps.todo.models import Task
 from apps.users.serializers import UserSerializer
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Takes the ``fields`` to serialize, see apps.todo.fieldsets. memo_preview
+    is only sent when asked for.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep = set(fields) if fields is not None else set(self.fields) - {'memo_preview'}
+        for name in set(self.fields) - keep:
+            self.fields.pop(name)
+
+
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
+    memo_preview = serializers.CharField(read_only=True)
     author_id = serializers.IntegerField(write_only=True)
 
     class Meta:
         model = Task
-        fields = '__all__'
+        exclude = ('search_vector',)
         extra_kwargs = {
             'created_time': {
                 'read_only': True,
@@ -19,6 +34,34 @@ class TaskSerializer(serializers.ModelSerializer):
             'updated_time': {
                 'read_only': True,
                 'required': False,
+            },
+            'completed_time': {
+                'read_only': True,
+                'required': False,
             }
         }
 
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_time'])
+        return instance
+
+
+class TaskListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    List pages only ever hold the requesting user's tasks, so the author is
+    left out of the rows and sent once next to the results.
+    """
+    memo_preview = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Task
+        fields = (*LIST_FIELDS, 'memo_preview')
+        read_only_fields = fields
+
+
+class TaskBulkSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Task
+        fields = ('title', 'memo', 'important', 'is_completed')
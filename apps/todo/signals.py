@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.todo.cache import bump_version
+from apps.users.models import User
+from apps.users.serializers import UserSerializer
+
+AUTHOR_FIELDS = frozenset(UserSerializer.Meta.fields)
+
+
+@receiver(post_save, sender=User, dispatch_uid='todo_user_saved')
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    """
+    Task responses and their ETags embed the user as the author, so they are
+    invalidated when a field the author shows may have changed. Saves that
+    only touch other fields (e.g. last_login) keep them.
+    """
+    if update_fields is None or AUTHOR_FIELDS & set(update_fields):
+        bump_version(instance.pk)
@@ -0,0 +1,132 @@
+from asgiref.sync import sync_to_async
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.todo.models import Task, TaskStats, TaskDailyStats
+
+# is_completed -> counter field, tasks with a null is_completed are in neither list
+FIELDS = {False: 'current', True: 'completed'}
+STATE_FIELDS = ('is_completed', 'important', 'completed_time')
+
+
+def get_state(task):
+    """
+    The part of a task the aggregates depend on, None stands for no task.
+    """
+    return tuple(getattr(task, field) for field in STATE_FIELDS)
+
+
+def count_tasks(user_id):
+    return Task.objects.filter(author_id=user_id).aggregate(
+        total=Count('id'),
+        current=Count('id', filter=Q(is_completed=False)),
+        completed=Count('id', filter=Q(is_completed=True)),
+        important=Count('id', filter=Q(important=True)),
+    )
+
+
+def count_completions(user_id):
+    rows = Task.objects.filter(author_id=user_id, is_completed=True, completed_time__isnull=False) \
+        .annotate(day=TruncDate('completed_time')).values('day').annotate(completed=Count('id'))
+    return {row['day']: row['completed'] for row in rows}
+
+
+def rebuild_task_stats(user_id):
+    stats, _ = TaskStats.objects.update_or_create(user_id=user_id, defaults=count_tasks(user_id))
+    TaskDailyStats.objects.filter(user_id=user_id).delete()
+    TaskDailyStats.objects.bulk_create(
+        [TaskDailyStats(user_id=user_id, day=day, completed=n) for day, n in count_completions(user_id).items()]
+    )
+    return stats
+
+
+def verify_task_stats(user_id):
+    """
+    Returns {name: (stored, actual)} for every aggregate that has drifted.
+    Users without aggregates yet have nothing to drift, they are built on
+    first read.
+    """
+    stats = TaskStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        return {}
+    differences = {}
+    for field, actual in count_tasks(user_id).items():
+        stored = getattr(stats, field)
+        if stored != actual:
+            differences[field] = (stored, actual)
+    stored_days = dict(TaskDailyStats.objects.filter(user_id=user_id).exclude(completed=0)
+                       .values_list('day', 'completed'))
+    actual_days = count_completions(user_id)
+    for day in stored_days.keys() | actual_days.keys():
+        if stored_days.get(day) != actual_days.get(day):
+            differences[str(day)] = (stored_days.get(day), actual_days.get(day))
+    return differences
+
+
+def get_task_stats(user_id):
+    stats = TaskStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        stats = rebuild_task_stats(user_id)
+    return stats
+
+
+def add_change(deltas, old, new, n=1):
+    """
+    Adds ``n`` tasks going from the ``old`` to the ``new`` state (see get_state)
+    to ``deltas``.
+    """
+    for state, sign in ((old, -n), (new, n)):
+        if state is None:
+            continue
+        is_completed, important, completed_time = state
+        deltas['total'] = deltas.get('total', 0) + sign
+        if is_completed in FIELDS:
+            deltas[FIELDS[is_completed]] = deltas.get(FIELDS[is_completed], 0) + sign
+        if important:
+            deltas['important'] = deltas.get('important', 0) + sign
+        if is_completed and completed_time is not None:
+            days = deltas.setdefault('days', {})
+            day = timezone.localdate(completed_time)
+            days[day] = days.get(day, 0) + sign
+    return deltas
+
+
+def split_deltas(deltas):
+    fields = {field: delta for field, delta in deltas.items() if field != 'days' and delta}
+    days = {day: delta for day, delta in deltas.get('days', {}).items() if delta}
+    return fields, days
+
+
+def adjust_task_stats(user_id, deltas):
+    """
+    Applies ``deltas`` to the user's aggregates. Call it in the same
+    transaction as the task write, after it: missing aggregates are rebuilt
+    from the tasks table, which already holds the change.
+    """
+    fields, days = split_deltas(deltas)
+    if not fields and not days:
+        return
+    updated = TaskStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta for field, delta in fields.items()}
+    ) if fields else TaskStats.objects.filter(user_id=user_id).exists()
+    if not updated:
+        rebuild_task_stats(user_id)
+        return
+    for day, delta in days.items():
+        daily = TaskDailyStats.objects.filter(user_id=user_id, day=day)
+        if not daily.update(completed=F('completed') + delta):
+            # first change of the day, a concurrent writer may be creating the row too
+            TaskDailyStats.objects.bulk_create([TaskDailyStats(user_id=user_id, day=day)], ignore_conflicts=True)
+            daily.update(completed=F('completed') + delta)
+
+
+def move_task_stats(user_id, old, new, n=1):
+    adjust_task_stats(user_id, add_change({}, old, new, n))
+
+
+async def aget_task_stats(user_id):
+    stats = await TaskStats.objects.filter(user_id=user_id).afirst()
+    if stats is None:
+        stats = await sync_to_async(rebuild_task_stats)(user_id)
+    return stats
@@ -1,3 +1,207 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from apps.todo.models import Task, TaskDailyStats, TaskStats, TaskTombstone
+from apps.todo.stats import rebuild_task_stats, verify_task_stats
+from apps.users.models import User
+from apps.users.tokens import RefreshToken
+
+
+class TaskMutationQueryCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='owner', phone='+998901111111')
+        self.other = User.objects.create(username='other', phone='+998902222222')
+        self.task = Task.objects.create(title='Task', memo='Memo', author=self.user)
+        rebuild_task_stats(self.user.id)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_detail(self):
+        # validators aggregate + the row with its author
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/todo/detail/{self.task.id}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_complete(self):
+        # savepoint + UPDATE task + UPDATE stats + UPDATE day + release, the first
+        # completion of a day also inserts the day row and updates it again
+        TaskDailyStats.objects.create(user=self.user, day=timezone.localdate())
+        with self.assertNumQueries(5):
+            response = self.client.post(f'/todo/to_complete/{self.task.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.task.refresh_from_db()
+        self.assertTrue(self.task.is_completed)
+        stats = TaskStats.objects.get(user=self.user)
+        self.assertEqual((stats.current, stats.completed), (0, 1))
+        self.assertEqual(TaskDailyStats.objects.get(user=self.user).completed, 1)
+
+    def test_update(self):
+        # savepoint + the locked row + UPDATE of the sent fields + release
+        with self.assertNumQueries(4):
+            response = self.client.patch(f'/todo/update/{self.task.id}/', {'title': 'New'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['title'], 'New')
+
+    def test_delete(self):
+        # savepoint + state SELECT + DELETE + tombstone INSERT + UPDATE counter + release
+        with self.assertNumQueries(6):
+            response = self.client.delete(f'/todo/delete/{self.task.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Task.objects.filter(id=self.task.id).exists())
+        self.assertTrue(TaskTombstone.objects.filter(task_id=self.task.id).exists())
+        self.assertEqual(TaskStats.objects.get(user=self.user).current, 0)
+
+    def test_other_users_task_is_not_found(self):
+        self.client.force_authenticate(self.other)
+        for method, url, queries in (
+                ('get', f'/todo/detail/{self.task.id}/', 1),
+                ('post', f'/todo/to_complete/{self.task.id}/', 6),
+                ('patch', f'/todo/update/{self.task.id}/', 4),
+                ('delete', f'/todo/delete/{self.task.id}/', 3),
+        ):
+            with self.assertNumQueries(queries):
+                response = getattr(self.client, method)(url)
+            self.assertEqual(response.status_code, 404)
+        self.task.refresh_from_db()
+        self.assertFalse(self.task.is_completed)
+
+
+class TaskStatsMaintenanceTest(TestCase):
+    """
+    Every write path keeps TaskStats/TaskDailyStats equal to a recount.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='owner', phone='+998901111111')
+        self.other = User.objects.create(username='other', phone='+998902222222')
+        self.tasks = [
+            Task.objects.create(title=f'Task {i}', memo='Memo', author=self.user, important=i % 2 == 0)
+            for i in range(4)
+        ]
+        rebuild_task_stats(self.user.id)
+        rebuild_task_stats(self.other.id)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.access_token = RefreshToken.for_user(self.user).access_token
+
+    def assertStatsInSync(self, *users):
+        for user in users or (self.user,):
+            self.assertEqual(verify_task_stats(user.id), {})
+
+    def test_create_update_and_reopen(self):
+        response = self.client.post('/todo/create/', {'title': 'New', 'memo': 'Memo', 'important': True},
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+        task = self.tasks[0]
+        response = self.client.patch(f'/todo/update/{task.id}/', {'is_completed': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertStatsInSync()
+        self.assertEqual(TaskStats.objects.get(user=self.user).completed, 1)
+        response = self.client.put(f'/todo/update/{task.id}/',
+                                   {'title': 'Reopened', 'memo': 'Memo', 'important': False, 'is_completed': False},
+                                   format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertStatsInSync()
+        self.assertEqual(TaskStats.objects.get(user=self.user).completed, 0)
+
+    def test_complete_twice(self):
+        task = self.tasks[0]
+        for _ in range(2):
+            self.client.post(f'/todo/to_complete/{task.id}/')
+            self.client.patch(f'/todo/update/{task.id}/', {'is_completed': True}, format='json')
+        self.assertStatsInSync()
+        self.assertEqual(TaskDailyStats.objects.get(user=self.user).completed, 1)
+
+    def test_delete(self):
+        response = self.client.delete(f'/todo/delete/{self.tasks[0].id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertStatsInSync()
+
+    def test_bulk(self):
+        ids = [task.id for task in self.tasks]
+        response = self.client.post('/todo/bulk/create/', {'tasks': [
+            {'title': 'Bulk', 'memo': 'Memo', 'is_completed': True},
+            {'title': 'Bulk', 'memo': 'Memo', 'important': True},
+            {'title': ''},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertStatsInSync()
+        response = self.client.patch('/todo/bulk/update/', {'tasks': [
+            {'id': ids[0], 'is_completed': True},
+            {'id': ids[0], 'important': True},
+            {'id': ids[1], 'is_completed': None},
+            {'id': ids[2], 'important': False},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertStatsInSync()
+        response = self.client.post('/todo/bulk/complete/', {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertStatsInSync()
+        response = self.client.post('/todo/bulk/delete/', {'ids': ids[:3]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertStatsInSync()
+
+    def test_import(self):
+        file = SimpleUploadedFile(
+            'tasks.ndjson',
+            b'{"title": "A", "memo": "M", "is_completed": true, "completed_time": "2024-01-02T12:00:00Z"}\n'
+            b'{"title": "B", "memo": "M", "important": true}\n'
+            b'{"title": ""}\n'
+        )
+        response = self.client.post('/todo/import/', {'file': file})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['created'], 2)
+        self.assertStatsInSync()
+        # completions keep their day instead of counting as today's
+        daily = TaskDailyStats.objects.get(user=self.user)
+        self.assertEqual(daily.day, timezone.localdate(Task.objects.get(title='A').completed_time))
+        self.assertEqual(daily.day.year, 2024)
+
+    def test_admin(self):
+        admin = User.objects.create(username='admin', phone='+998903333333', is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        task = self.tasks[0]
+        data = {'title': task.title, 'memo': task.memo, 'author': self.other.id, 'important': 'on',
+                'is_completed': 'true'}
+        response = self.client.post(f'/admin/todo/task/{task.id}/change/', data)
+        self.assertEqual(response.status_code, 302)
+        self.assertStatsInSync(self.user, self.other)
+        self.assertEqual(TaskStats.objects.get(user=self.other).completed, 1)
+        self.assertTrue(TaskTombstone.objects.filter(author=self.user, task_id=task.id).exists())
+        response = self.client.post('/admin/todo/task/add/', {**data, 'author': self.user.id})
+        self.assertEqual(response.status_code, 302)
+        self.assertStatsInSync(self.user, self.other)
+        response = self.client.post(f'/admin/todo/task/{task.id}/delete/', {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        response = self.client.post('/admin/todo/task/', {
+            'action': 'delete_selected', 'post': 'yes', '_selected_action': [t.id for t in self.tasks[1:3]],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Task.objects.filter(author=self.user).count(), 2)
+        self.assertStatsInSync(self.user, self.other)
+
+    async def test_async_views(self):
+        headers = {'AUTHORIZATION': f'Bearer {self.access_token}', 'content_type': 'application/json'}
+        response = await self.async_client.post('/todo/async/create/', {'title': 'New', 'memo': 'Memo'}, **headers)
+        self.assertEqual(response.status_code, 200)
+        task_id = self.tasks[0].id
+        response = await self.async_client.patch(f'/todo/async/update/{task_id}/', {'is_completed': True}, **headers)
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.post(f'/todo/async/to_complete/{task_id}/', **headers)
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.post(f'/todo/async/to_complete/{self.tasks[1].id}/', **headers)
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.put(
+            f'/todo/async/update/{task_id}/',
+            {'title': 'Reopened', 'memo': 'Memo', 'important': False, 'is_completed': False}, **headers
+        )
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.delete(f'/todo/async/delete/{self.tasks[1].id}/', **headers)
+        self.assertEqual(response.status_code, 200)
+        await sync_to_async(self.assertStatsInSync)()
@@ -1,7 +1,11 @@
 from django.urls import path
 
+from apps.todo.async_views import AsyncCurrentTaskListView, AsyncCompletedTaskListView, AsyncTaskDetailView, \
+    AsyncTaskCreateView, AsyncTaskUpdateView, AsyncToCompleteView, AsyncTaskDeleteView
 from apps.todo.views import CurrentTaskListAPIView, TaskDeleteAPIView, TaskDetailAPIView, TaskUpdateAPIView, \
-    TaskCreateAPIView, CompletedTaskListAPIView, ToCompleteAPIView
+    TaskCreateAPIView, CompletedTaskListAPIView, ToCompleteAPIView, TaskBulkCreateAPIView, TaskBulkUpdateAPIView, \
+    TaskBulkCompleteAPIView, TaskBulkDeleteAPIView, TaskSyncAPIView, TaskSearchAPIView, \
+    TaskExportAPIView, TaskImportAPIView, TaskStatsAPIView
 
 app_name = 'todo'
 
@@ -13,4 +17,22 @@ urlpatterns = [
     path('delete/<int:pk>/', TaskDeleteAPIView.as_view()),
     path('update/<int:pk>/', TaskUpdateAPIView.as_view()),
     path('to_complete/<int:pk>/', ToCompleteAPIView.as_view()),
+    path('bulk/create/', TaskBulkCreateAPIView.as_view()),
+    path('bulk/update/', TaskBulkUpdateAPIView.as_view()),
+    path('bulk/complete/', TaskBulkCompleteAPIView.as_view()),
+    path('bulk/delete/', TaskBulkDeleteAPIView.as_view()),
+    path('sync/', TaskSyncAPIView.as_view()),
+    path('search/', TaskSearchAPIView.as_view()),
+    path('export/', TaskExportAPIView.as_view()),
+    path('import/', TaskImportAPIView.as_view()),
+    path('stats/', TaskStatsAPIView.as_view()),
+
+    # async variants for the ASGI entry point
+    path('async/current/list/', AsyncCurrentTaskListView.as_view()),
+    path('async/completed/list/', AsyncCompletedTaskListView.as_view()),
+    path('async/create/', AsyncTaskCreateView.as_view()),
+    path('async/detail/<int:pk>/', AsyncTaskDetailView.as_view()),
+    path('async/delete/<int:pk>/', AsyncTaskDeleteView.as_view()),
+    path('async/update/<int:pk>/', AsyncTaskUpdateView.as_view()),
+    path('async/to_complete/<int:pk>/', AsyncToCompleteView.as_view()),
 ]
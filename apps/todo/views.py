@@ -1,60 +1,102 @@
+import codecs
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.todo.serializers import TaskSerializer
-from apps.todo.models import Task
-from shared.pagination import CustomPagination
+from apps.todo.cache import bump_version, get_cached_data
+from apps.todo.export import EXPORT_FORMATS, encode_chunks, get_rows, gzip_chunks
+from apps.todo.fieldsets import DETAIL_FIELDS, LIST_FIELDS, get_fields, select_fields
+from apps.todo.importer import PARSERS, import_tasks
+from apps.todo.stats import add_change, adjust_task_stats, get_state, get_task_stats, \
+    move_task_stats, STATE_FIELDS
+from apps.todo.conditional import get_validators, get_not_modified_response, set_validators
+from apps.todo.serializers import TaskSerializer, TaskListSerializer, TaskBulkSerializer
+from apps.todo.models import Task, TaskTombstone
+from apps.todo.search import search_tasks
+from apps.users.serializers import UserSerializer
+from shared.pagination import get_pagination, RankedCursorPagination
 
 
-class CurrentTaskListAPIView(APIView):
+class TaskListAPIView(APIView):
     permission_classes = (IsAuthenticated,)
+    is_completed = None
 
     def get(self, request):
-        user = self.request.user
-        tasks = Task.objects.filter(author=user, is_completed=False)
-        pagination = CustomPagination()
-        page_obj = pagination.paginate_queryset(tasks, request)
-        serializer = TaskSerializer(page_obj, many=True)
-        return pagination.get_paginated_response(data=serializer.data)
+        # A list can lose rows without its max(updated_time) moving, so lists
+        # are validated by ETag only
+        etag, _ = get_validators(request, self.get_queryset(), f'list:{self.is_completed}', count=self.get_count)
+        not_modified = get_not_modified_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(Response(get_cached_data(request, self.get_data)), etag)
 
+    def get_queryset(self):
+        return Task.objects.filter(author=self.request.user, is_completed=self.is_completed)
 
-class CompletedTaskListAPIView(APIView):
-    permission_classes = (IsAuthenticated,)
+    def get_count(self):
+        stats = get_task_stats(self.request.user.id)
+        return stats.completed if self.is_completed else stats.current
+
+    def get_data(self):
+        request = self.request
+        user = request.user
+        fields = get_fields(request.query_params, LIST_FIELDS)
+        tasks = select_fields(self.get_queryset(), fields, extra=('created_time',)).order_by('created_time', 'id')
+        count = None
+        # Staff can still ask for an exact COUNT(*) instead of the maintained counter
+        if not (user.is_staff and request.query_params.get('exact_count') == 'true'):
+            count = self.get_count()
+        pagination = get_pagination(request, count=count)
+        page_obj = pagination.paginate_queryset(tasks, request, view=self)
+        serializer = TaskListSerializer(page_obj, many=True, fields=fields)
+        data = pagination.get_paginated_response(data=serializer.data).data
+        data['author'] = UserSerializer(user).data
+        return data
 
-    def get(self, request):
-        user = self.request.user
-        tasks = Task.objects.filter(author=user, is_completed=True)
-        pagination = CustomPagination()
-        page_obj = pagination.paginate_queryset(tasks, request)
-        serializer = TaskSerializer(page_obj, many=True)
-        return pagination.get_paginated_response(data=serializer.data)
+
+class CurrentTaskListAPIView(TaskListAPIView):
+    is_completed = False
+
+
+class CompletedTaskListAPIView(TaskListAPIView):
+    is_completed = True
 
 
 class TaskDetailAPIView(APIView):
     permission_classes = (IsAuthenticated,)
 
     def get(self, request, pk):
-        task = get_object_or_404(Task.objects.all(), id=pk)
+        etag, last_modified = get_validators(request, Task.objects.filter(id=pk, author=request.user), f'detail:{pk}')
+        if etag is None:
+            raise NotFound()
+        not_modified = get_not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = Response(get_cached_data(request, lambda: self.get_data(pk)))
+        return set_validators(response, etag, last_modified)
+
+    def get_data(self, pk):
         user = self.request.user
-        if not task.author == user:
-            raise ValidationError(
-                {
-                    'success': False,
-                    'detail': 'This task is not yours, you are not permission'
-                }
-            )
-        serializer = TaskSerializer(task)
-        return Response(
-            {
-                'success': True,
-                'data': serializer.data,
-                'status': status.HTTP_200_OK
-            }
-        )
+        fields = get_fields(self.request.query_params, DETAIL_FIELDS)
+        task = get_object_or_404(select_fields(Task.objects.all(), fields), id=pk, author=user)
+        serializer = TaskSerializer(task, fields=fields)
+        return {
+            'success': True,
+            'data': serializer.data,
+            'status': status.HTTP_200_OK
+        }
 
 
 class TaskCreateAPIView(APIView):
@@ -66,7 +108,10 @@ class TaskCreateAPIView(APIView):
         data['author_id'] = user.id
         serializer = TaskSerializer(data=data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with transaction.atomic():
+            task = serializer.save()
+            move_task_stats(user.id, None, get_state(task))
+        bump_version(user.id)
         return Response(
             {
                 'success': True,
@@ -80,17 +125,18 @@ class ToCompleteAPIView(APIView):
     permission_classes = (IsAuthenticated,)
 
     def post(self, request, pk):
-        task = get_object_or_404(Task.objects.all(), id=pk)
         user = self.request.user
-        if not task.author == user:
-            raise ValidationError(
-                {
-                    'success': False,
-                    'detail': 'This task is not yours, you are not permission'
-                }
-            )
-        task.is_completed = True
-        task.save()
+        tasks = Task.objects.filter(id=pk, author=user)
+        now = timezone.now()
+        with transaction.atomic():
+            # important doesn't change here, so it's left out of the states
+            if tasks.filter(is_completed=False).update(is_completed=True, completed_time=now, updated_time=now):
+                move_task_stats(user.id, (False, False, None), (True, False, now))
+            elif tasks.filter(is_completed__isnull=True).update(is_completed=True, completed_time=now, updated_time=now):
+                move_task_stats(user.id, (None, False, None), (True, False, now))
+            elif not tasks.exists():
+                raise NotFound()
+        bump_version(user.id)
         return Response(
             {
                 'success': True,
@@ -104,20 +150,21 @@ class TaskUpdateAPIView(APIView):
     permission_classes = (IsAuthenticated,)
 
     def put(self, request, pk):
-        task = get_object_or_404(Task.objects.all(), id=pk)
         user = self.request.user
-        if not task.author == user:
-            raise ValidationError(
-                {
-                    'success': False,
-                    'detail': 'This task is not yours, you are not permission'
-                }
-            )
         data = self.request.data
         data['author_id'] = user.id
-        serializer = TaskSerializer(data=data, instance=task)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with transaction.atomic():
+            # locked, so a concurrent completion can't be counted twice
+            task = get_object_or_404(
+                Task.objects.select_for_update(of=('self',)).select_related('author').defer('search_vector'),
+                id=pk, author=user
+            )
+            serializer = TaskSerializer(data=data, instance=task)
+            serializer.is_valid(raise_exception=True)
+            state = get_state(task)
+            serializer.save()
+            move_task_stats(user.id, state, get_state(task))
+        bump_version(user.id)
         return Response(
             {
                 'success': True,
@@ -127,20 +174,21 @@ class TaskUpdateAPIView(APIView):
         )
 
     def patch(self, request, pk):
-        task = get_object_or_404(Task.objects.all(), id=pk)
         user = self.request.user
-        if not task.author == user:
-            raise ValidationError(
-                {
-                    'success': False,
-                    'detail': 'This task is not yours, you are not permission'
-                }
-            )
         data = self.request.data
         data['author_id'] = user.id
-        serializer = TaskSerializer(data=data, instance=task, partial=True)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with transaction.atomic():
+            # locked, so a concurrent completion can't be counted twice
+            task = get_object_or_404(
+                Task.objects.select_for_update(of=('self',)).select_related('author').defer('search_vector'),
+                id=pk, author=user
+            )
+            serializer = TaskSerializer(data=data, instance=task, partial=True)
+            serializer.is_valid(raise_exception=True)
+            state = get_state(task)
+            serializer.save()
+            move_task_stats(user.id, state, get_state(task))
+        bump_version(user.id)
         return Response(
             {
                 'success': True,
@@ -154,21 +202,382 @@ class TaskDeleteAPIView(APIView):
     permission_classes = (IsAuthenticated,)
 
     def delete(self, request, pk):
-        task = get_object_or_404(Task.objects.all(), id=pk)
         user = self.request.user
-        if task.author == user:
-            task.delete()
-            return Response(
+        tasks = Task.objects.filter(id=pk, author=user)
+        with transaction.atomic():
+            state = tasks.select_for_update().values_list(*STATE_FIELDS).first()
+            if state is not None:
+                tasks.delete()
+                TaskTombstone.record(user.id, [pk])
+                move_task_stats(user.id, state, None)
+        if state is None:
+            raise NotFound()
+        bump_version(user.id)
+        return Response(
+            {
+                'success': True,
+                'detail': 'You successfully deleted your task',
+                'status': status.HTTP_200_OK
+            }
+        )
+
+
+class TaskBulkAPIView(APIView):
+    permission_classes = (IsAuthenticated,)
+    items_key = 'ids'
+
+    def get_items(self):
+        data = self.request.data
+        items = data.get(self.items_key) if isinstance(data, Mapping) else None
+        if not isinstance(items, list) or not items:
+            raise ValidationError(
+                {
+                    'success': False,
+                    'detail': f'{self.items_key} must be a non-empty list'
+                }
+            )
+        if len(items) > settings.TODO_BULK_MAX_BATCH_SIZE:
+            raise ValidationError(
+                {
+                    'success': False,
+                    'detail': f'You can send at most {settings.TODO_BULK_MAX_BATCH_SIZE} items at once'
+                }
+            )
+        return items
+
+    def get_ids(self):
+        ids = self.get_items()
+        if not all(self.is_id(pk) for pk in ids):
+            raise ValidationError(
+                {
+                    'success': False,
+                    'detail': 'ids must be a list of integers'
+                }
+            )
+        return ids
+
+    @staticmethod
+    def is_id(value):
+        # bool is a subclass of int, true must not stand for task 1
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    def get_response(self, results):
+        return Response(
+            {
+                'success': True,
+                'data': results,
+                'status': status.HTTP_200_OK
+            }
+        )
+
+
+class TaskBulkCreateAPIView(TaskBulkAPIView):
+    items_key = 'tasks'
+
+    def post(self, request):
+        user = self.request.user
+        results = []
+        tasks = []
+        for item in self.get_items():
+            serializer = TaskBulkSerializer(data=item)
+            if serializer.is_valid():
+                task = Task(author=user, **serializer.validated_data)
+                tasks.append(task)
+                results.append({'success': True, 'task': task})
+            else:
+                results.append({'success': False, 'errors': serializer.errors})
+        now = timezone.now()
+        deltas = {}
+        for task in tasks:
+            task.update_completed_time(now)
+            add_change(deltas, None, get_state(task))
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            adjust_task_stats(user.id, deltas)
+            bump_version(user.id)
+        for result in results:
+            task = result.pop('task', None)
+            if task is not None:
+                result['data'] = TaskListSerializer(task).data
+        return self.get_response(results)
+
+
+class TaskBulkUpdateAPIView(TaskBulkAPIView):
+    items_key = 'tasks'
+
+    def patch(self, request):
+        user = self.request.user
+        items = self.get_items()
+        ids = [item.get('id') for item in items if isinstance(item, dict) and self.is_id(item.get('id'))]
+        now = timezone.now()
+        results = []
+        changed = {}
+        original = {}
+        fields = {'updated_time'}
+        with transaction.atomic():
+            tasks = Task.objects.select_for_update().filter(author=user, id__in=ids).in_bulk()
+            for item in items:
+                pk = item.get('id') if isinstance(item, dict) else None
+                task = tasks.get(pk) if self.is_id(pk) else None
+                if task is None:
+                    results.append({'id': pk, 'success': False, 'detail': 'Task not found'})
+                    continue
+                serializer = TaskBulkSerializer(data=item, partial=True)
+                if not serializer.is_valid():
+                    results.append({'id': task.id, 'success': False, 'errors': serializer.errors})
+                    continue
+                original.setdefault(task.id, get_state(task))
+                for field, value in serializer.validated_data.items():
+                    setattr(task, field, value)
+                task.update_completed_time(now)
+                fields.update(serializer.validated_data)
+                if 'is_completed' in serializer.validated_data:
+                    fields.add('completed_time')
+                task.updated_time = now
+                changed[task.id] = task
+                results.append({'id': task.id, 'success': True})
+            Task.objects.bulk_update(changed.values(), fields)
+            deltas = {}
+            for task in changed.values():
+                add_change(deltas, original[task.id], get_state(task))
+            adjust_task_stats(user.id, deltas)
+            bump_version(user.id)
+        for result in results:
+            if result['success']:
+                result['data'] = TaskListSerializer(changed[result['id']]).data
+        return self.get_response(results)
+
+
+class TaskBulkCompleteAPIView(TaskBulkAPIView):
+
+    def post(self, request):
+        user = self.request.user
+        ids = self.get_ids()
+        with transaction.atomic():
+            tasks = Task.objects.filter(author=user, id__in=ids)
+            found = set(tasks.values_list('id', flat=True))
+            now = timezone.now()
+            # important doesn't change here, so it's left out of the states
+            updated = tasks.filter(is_completed=False).update(is_completed=True, completed_time=now, updated_time=now)
+            deltas = add_change({}, (False, False, None), (True, False, now), updated)
+            updated = tasks.filter(is_completed__isnull=True) \
+                .update(is_completed=True, completed_time=now, updated_time=now)
+            add_change(deltas, (None, False, None), (True, False, now), updated)
+            adjust_task_stats(user.id, deltas)
+            bump_version(user.id)
+        return self.get_response(
+            [{'id': pk, 'success': pk in found} for pk in ids]
+        )
+
+
+class TaskBulkDeleteAPIView(TaskBulkAPIView):
+
+    def post(self, request):
+        user = self.request.user
+        ids = self.get_ids()
+        with transaction.atomic():
+            tasks = Task.objects.filter(author=user, id__in=ids)
+            found = {pk: state for pk, *state in tasks.select_for_update().values_list('id', *STATE_FIELDS)}
+            tasks.delete()
+            TaskTombstone.record(user.id, found)
+            deltas = {}
+            for state in found.values():
+                add_change(deltas, state, None)
+            adjust_task_stats(user.id, deltas)
+            bump_version(user.id)
+        return self.get_response(
+            [{'id': pk, 'success': pk in found} for pk in ids]
+        )
+
+
+class TaskSyncAPIView(APIView):
+    """
+    Returns the tasks created or updated and the ids of tasks deleted since the
+    ``since`` token of the previous sync, plus the token for the next one.
+    Without a token, or with one older than the tombstone retention, the full
+    list is returned with ``reset`` set, and the client should replace its copy.
+    """
+    permission_classes = (IsAuthenticated,)
+    token_salt = 'todo.sync'
+
+    def get(self, request):
+        user = self.request.user
+        # Rows committed late can carry an updated_time slightly older than
+        # the watermark, so the next sync starts a little earlier
+        watermark = timezone.now() - timedelta(seconds=settings.TODO_SYNC_SAFETY_MARGIN)
+        since = self.get_since()
+        tasks = Task.objects.filter(author=user).only(*LIST_FIELDS)
+        deleted = []
+        if since is not None:
+            tasks = tasks.filter(updated_time__gte=since)
+            deleted = TaskTombstone.objects.filter(author=user, deleted_time__gte=since) \
+                .values_list('task_id', flat=True)
+        serializer = TaskListSerializer(tasks.order_by('updated_time', 'id'), many=True)
+        return Response(
+            {
+                'success': True,
+                'data': {
+                    'reset': since is None,
+                    'tasks': serializer.data,
+                    'deleted': list(deleted),
+                    'since': signing.dumps(watermark.isoformat(), salt=self.token_salt),
+                },
+                'status': status.HTTP_200_OK
+            }
+        )
+
+    def get_since(self):
+        token = self.request.query_params.get('since')
+        if not token:
+            return None
+        try:
+            since = datetime.fromisoformat(signing.loads(token, salt=self.token_salt))
+        except (signing.BadSignature, TypeError, ValueError):
+            raise ValidationError(
                 {
-                    'success': True,
-                    'detail': 'You successfully deleted your task',
-                    'status': status.HTTP_200_OK
+                    'success': False,
+                    'detail': 'Invalid sync token'
                 }
             )
-        else:
+        if since < timezone.now() - timedelta(days=settings.TODO_TOMBSTONE_RETENTION_DAYS):
+            return None
+        return since
+
+
+class TaskSearchAPIView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        return Response(get_cached_data(request, self.get_data))
+
+    def get_data(self):
+        request = self.request
+        user = request.user
+        q = request.query_params.get('q', '').strip()
+        if not q:
+            raise ValidationError(
+                {
+                    'success': False,
+                    'detail': 'q is required'
+                }
+            )
+        fields = get_fields(request.query_params, LIST_FIELDS)
+        tasks = select_fields(search_tasks(user, q), fields)
+        pagination = RankedCursorPagination()
+        page_obj = pagination.paginate_queryset(tasks, request, view=self)
+        serializer = TaskListSerializer(page_obj, many=True, fields=fields)
+        data = pagination.get_paginated_response(data=serializer.data).data
+        data['author'] = UserSerializer(user).data
+        return data
+
+
+class TaskExportAPIView(APIView):
+    """
+    Streams all the user's tasks as NDJSON (default) or CSV with ``?output=csv``,
+    gzip compressed with ``?gzip=true``.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
             raise ValidationError(
                 {
                     'success': False,
-                    'detail': 'This task is not yours, you are not permission'
+                    'detail': f"output must be one of: {', '.join(EXPORT_FORMATS)}"
                 }
             )
+        lines, content_type = EXPORT_FORMATS[output]
+        rows = get_rows(request.user, settings.TODO_EXPORT_CHUNK_SIZE)
+        chunks = encode_chunks(lines(rows))
+        filename = f'tasks.{output}'
+        if request.query_params.get('gzip') == 'true':
+            chunks = gzip_chunks(chunks)
+            content_type = 'application/gzip'
+            filename += '.gz'
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class TaskImportAPIView(APIView):
+    """
+    Imports an uploaded NDJSON or CSV ``file``, read line by line. The format
+    is taken from ``input`` or the file extension.
+    """
+    permission_classes = (IsAuthenticated,)
+    parser_classes = (MultiPartParser,)
+
+    def post(self, request):
+        file = request.FILES.get('file')
+        if file is None:
+            raise ValidationError(
+                {
+                    'success': False,
+                    'detail': 'file is required'
+                }
+            )
+        input_format = request.data.get('input') or file.name.rsplit('.', 1)[-1].lower()
+        if input_format not in PARSERS:
+            raise ValidationError(
+                {
+                    'success': False,
+                    'detail': f"input must be one of: {', '.join(PARSERS)}"
+                }
+            )
+        lines = codecs.iterdecode(file, 'utf-8-sig')
+        try:
+            result = import_tasks(request.user.id, lines, input_format, settings.TODO_IMPORT_BATCH_SIZE)
+        except UnicodeDecodeError:
+            raise ValidationError(
+                {
+                    'success': False,
+                    'detail': 'file must be UTF-8 encoded'
+                }
+            )
+        return Response(
+            {
+                'success': True,
+                'data': result,
+                'status': status.HTTP_200_OK
+            }
+        )
+
+
+class TaskStatsAPIView(APIView):
+    """
+    Dashboard numbers, read from the maintained aggregates. ``days`` picks how
+    many days of completions are returned, today included.
+    """
+    permission_classes = (IsAuthenticated,)
+    max_days = 365
+
+    def get(self, request):
+        days = request.query_params.get('days', '30')
+        if not days.isdigit() or not 1 <= int(days) <= self.max_days:
+            raise ValidationError(
+                {
+                    'success': False,
+                    'detail': f'days must be between 1 and {self.max_days}'
+                }
+            )
+        user = request.user
+        stats = get_task_stats(user.id)
+        since = timezone.localdate() - timedelta(days=int(days) - 1)
+        daily = user.task_daily_stats.filter(day__gte=since, completed__gt=0).order_by('day')
+        return Response(
+            {
+                'success': True,
+                'data': {
+                    'total': stats.total,
+                    'open': stats.current,
+                    'completed': stats.completed,
+                    'important': stats.important,
+                    'completions': [
+                        {'day': day, 'completed': completed}
+                        for day, completed in daily.values_list('day', 'completed')
+                    ],
+                },
+                'status': status.HTTP_200_OK
+            }
+        )
@@ -0,0 +1,138 @@
+import json
+import math
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+
+from apps.users.authentication import aauthenticate
+from apps.users.backends import aauthenticate_credentials
+from apps.users.tokens import RefreshToken
+from shared.hashing import HashingBusy, aset_password
+from shared.throttling import IPThrottle, consume
+
+# Async variants of the login and password reset endpoints for the ASGI entry
+# point, with the same responses. The password hashing runs in the bounded
+# pool of shared.hashing, so waiting for it doesn't hold a worker thread.
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAuthView(View):
+    throttle_scope = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except HashingBusy as exc:
+            return JsonResponse({'detail': exc.detail}, status=exc.status_code, headers={'Retry-After': str(exc.retry_after)})
+
+    def get_json(self):
+        try:
+            data = json.loads(self.request.body or b'{}')
+        except ValueError:
+            data = None
+        return data if isinstance(data, dict) else {}
+
+    def throttled(self, identity=None):
+        """
+        The same token buckets as the DRF views of the scope, returns a 429
+        response when one of them is empty.
+        """
+        keys = [('ip', IPThrottle().get_ident(self.request))]
+        if identity:
+            keys.append(('identity', identity))
+        waits = [wait for allowed, wait in (consume(self.throttle_scope, kind, key) for kind, key in keys)
+                 if not allowed]
+        if not waits:
+            return None
+        wait = math.ceil(max(waits))
+        return JsonResponse(
+            {'detail': f'Request was throttled. Expected available in {wait} seconds.'},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(wait)}
+        )
+
+
+class AsyncLoginView(AsyncAuthView):
+    throttle_scope = 'login'
+
+    async def post(self, request):
+        data = self.get_json()
+        username, password = data.get('username'), data.get('password')
+        if not isinstance(username, str) or not isinstance(password, str):
+            return JsonResponse(
+                {
+                    'username': ['This field is required.'],
+                    'password': ['This field is required.'],
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        throttled = self.throttled(username.strip().lower())
+        if throttled is not None:
+            return throttled
+        user = await aauthenticate_credentials(username, password)
+        if user is None:
+            return JsonResponse(
+                {
+                    'success': ['False'],
+                    'detail': ['You entered wrong username or password'],
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        refresh = await sync_to_async(RefreshToken.for_user)(user)
+        return JsonResponse(
+            {
+                'access': str(refresh.access_token),
+                'refresh': str(refresh),
+            }
+        )
+
+
+class AsyncResetPasswordView(AsyncAuthView):
+
+    async def put(self, request):
+        user = await aauthenticate(request)
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        data = self.get_json()
+        password, confirm_password = data.get('password'), data.get('confirm_password')
+        if not isinstance(password, str) or not isinstance(confirm_password, str):
+            return JsonResponse(
+                {
+                    'password': ['This field is required.'],
+                    'confirm_password': ['This field is required.'],
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if password != confirm_password:
+            return JsonResponse(
+                {
+                    'success': ['False'],
+                    'message': ["Password and confirm_password are not suitable"],
+                    'status': [str(status.HTTP_400_BAD_REQUEST)]
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            await sync_to_async(validate_password)(password)
+        except ValidationError as exc:
+            return JsonResponse({'non_field_errors': exc.messages}, status=status.HTTP_400_BAD_REQUEST)
+        await aset_password(user, password)
+        await user.asave()
+        return JsonResponse(
+            {
+                'success': True,
+                'message': "Your password successfully changed",
+                'status': status.HTTP_200_OK
+            }
+        )
+
+    patch = put
@@ -0,0 +1,61 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from apps.users.cache import aget_user, get_user
+from apps.users.models import User
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication with the user served from the cache for
+    USERS_AUTH_CACHE_TIMEOUT seconds, so most requests don't query it.
+    User.save() and User.delete() drop the cached copy from the shared cache,
+    changes made with queryset.update() show up once it expires.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_user(user_id, lambda: User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first())
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+async def aauthenticate(request):
+    """
+    Async counterpart of CachedJWTAuthentication for plain Django async views:
+    the token is checked in place and the user loaded with the async ORM.
+    Returns None when the request carries no valid token.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    try:
+        token = authentication.get_validated_token(raw_token)
+        user_id = token[api_settings.USER_ID_CLAIM]
+    except (InvalidToken, TokenError, KeyError):
+        return None
+    user = await aget_user(user_id, User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).afirst)
+    if user is None or not user.is_active:
+        return None
+    return user
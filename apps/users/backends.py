@@ -0,0 +1,39 @@
+from django.contrib.auth.backends import ModelBackend
+
+from apps.users.models import User
+from shared.hashing import ahash_dummy_password, averify_password, hash_dummy_password, verify_password
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend with the password checked in the hashing pool and recently
+    verified credentials served from the cache, see shared.hashing.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            hash_dummy_password(password)
+        else:
+            if verify_password(user, password) and self.user_can_authenticate(user):
+                return user
+
+
+async def aauthenticate_credentials(username, password):
+    """
+    Async counterpart of CachedModelBackend.authenticate().
+    """
+    if username is None or password is None:
+        return None
+    user = await User._default_manager.filter(**{User.USERNAME_FIELD: username}).afirst()
+    if user is None:
+        await ahash_dummy_password(password)
+        return None
+    if await averify_password(user, password) and CachedModelBackend().user_can_authenticate(user):
+        return user
+    return None
@@ -0,0 +1,51 @@
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+USER_KEY = 'users:user:{user_id}'
+
+
+def get_cache():
+    return caches[settings.USERS_CACHE_ALIAS]
+
+
+def get_user(user_id, load):
+    """
+    Returns the user from the cache, calling ``load`` on a miss. Users that
+    don't exist (``load`` returns None) are not cached.
+    """
+    if not settings.USERS_AUTH_CACHE_TIMEOUT:
+        return load()
+    cache = get_cache()
+    key = USER_KEY.format(user_id=user_id)
+    user = cache.get(key)
+    if user is None:
+        user = load()
+        if user is not None:
+            cache.set(key, user, timeout=settings.USERS_AUTH_CACHE_TIMEOUT)
+    return user
+
+
+async def aget_user(user_id, aload):
+    if not settings.USERS_AUTH_CACHE_TIMEOUT:
+        return await aload()
+    cache = get_cache()
+    key = USER_KEY.format(user_id=user_id)
+    user = await cache.aget(key)
+    if user is None:
+        user = await aload()
+        if user is not None:
+            await cache.aset(key, user, timeout=settings.USERS_AUTH_CACHE_TIMEOUT)
+    return user
+
+
+def forget_user(user_id):
+    """
+    Drops the cached user, and again after the commit when called inside a
+    transaction, so a request racing it can't keep the old row cached.
+    """
+    key = USER_KEY.format(user_id=user_id)
+    get_cache().delete(key)
+    transaction.on_commit(partial(get_cache().delete, key))
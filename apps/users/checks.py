@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+@register()
+def check_users_cache(app_configs, **kwargs):
+    """
+    The cached users are only dropped from USERS_CACHE_ALIAS, so caching them
+    needs a cache every process shares.
+    """
+    if settings.USERS_AUTH_CACHE_TIMEOUT and isinstance(caches[settings.USERS_CACHE_ALIAS], LocMemCache):
+        return [
+            Error(
+                'USERS_AUTH_CACHE_TIMEOUT needs a cache shared by all processes, '
+                f'the {settings.USERS_CACHE_ALIAS!r} cache is per process.',
+                hint='Set REDIS_URL, or USERS_AUTH_CACHE_TIMEOUT=0 to turn the user cache off.',
+                id='users.E001',
+            )
+        ]
+    return []
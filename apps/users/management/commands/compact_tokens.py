@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired outstanding and blacklisted refresh tokens, run it periodically (e.g. daily cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        # expires_at isn't indexed, so the table is walked in primary key
+        # ranges, each one a short transaction
+        bounds = OutstandingToken.objects.aggregate(first=Min('id'), last=Max('id'))
+        total = 0
+        start = bounds['first']
+        while start is not None and start <= bounds['last']:
+            # deleting the outstanding tokens cascades to their blacklist rows
+            total += OutstandingToken.objects.filter(
+                id__gte=start, id__lt=start + batch_size, expires_at__lt=now
+            ).delete()[1].get(OutstandingToken._meta.label, 0)
+            start += batch_size
+        self.stdout.write(self.style.SUCCESS(f'Deleted {total} expired tokens'))
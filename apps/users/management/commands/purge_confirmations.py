@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min, Q
+
+from apps.users.models import Confirmation
+
+
+class Command(BaseCommand):
+    help = 'Deletes confirmed and expired confirmation codes, run it periodically (e.g. hourly cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # time_limit is stored the way Confirmation.save() sets it
+        done = Q(is_confirmed=True) | Q(time_limit__lte=datetime.now())
+        # The table is walked in primary key ranges, so each DELETE is short
+        # and only locks the rows it removes
+        bounds = Confirmation.objects.aggregate(first=Min('id'), last=Max('id'))
+        total = 0
+        start = bounds['first']
+        while start is not None and start <= bounds['last']:
+            total += Confirmation.objects.filter(done, id__gte=start, id__lt=start + batch_size).delete()[0]
+            start += batch_size
+        self.stdout.write(self.style.SUCCESS(f'Deleted {total} confirmations'))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='confirmation',
+            index=models.Index(fields=['user', 'is_confirmed', 'time_limit'], name='confirmation_user_valid_idx'),
+        ),
+    ]
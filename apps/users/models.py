@@ -5,6 +5,8 @@ from django.contrib.auth.models import AbstractUser
 from django.core.validators import FileExtensionValidator
 from django.db import models
 
+from apps.users.cache import forget_user
+
 NEW, CODE, REGISTERED = 'new', 'code', 'registered'
 
 
@@ -29,6 +31,17 @@ class User(AbstractUser):
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
 
+    def save(self, *args, **kwargs):
+        super(User, self).save(*args, **kwargs)
+        # authentication serves users from the cache, see apps.users.authentication
+        forget_user(self.pk)
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super(User, self).delete(*args, **kwargs)
+        forget_user(pk)
+        return result
+
 
 class Confirmation(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='confirmations')
@@ -37,6 +50,12 @@ class Confirmation(models.Model):
     time_limit = models.DateTimeField(null=True)
     is_confirmed = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # code verification and the "valid code already sent" check
+            models.Index(fields=['user', 'is_confirmed', 'time_limit'], name='confirmation_user_valid_idx'),
+        ]
+
     def __str__(self):
         return self.phone
 
@@ -1,17 +1,20 @@
 import uuid
-from random import randint
+from functools import partial
 
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import update_last_login
 from django.contrib.auth.password_validation import validate_password
+from django.db import transaction
 from rest_framework import serializers, status
 from rest_framework.exceptions import ValidationError, NotFound
 from rest_framework.generics import get_object_or_404
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
+from rest_framework_simplejwt.tokens import AccessToken
 
+from shared.hashing import set_password
 from shared.utils import check_phone, send_email
 from apps.users.models import Confirmation, User
+from apps.users.tokens import RefreshToken
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -44,33 +47,21 @@ class SignUpByPhone(serializers.ModelSerializer):
                     'status': status.HTTP_400_BAD_REQUEST
                 }
             )
-
-        confirmed_users = Confirmation.objects.filter(phone=phone, is_confirmed=True)
-        if confirmed_users.exists():
-            raise ValidationError(
-                {
-                    'description': "This phone already exist",
-                    'status': status.HTTP_400_BAD_REQUEST
-                }
-            )
         return data
 
     def create(self, validated_data):
-        username = f"username-{uuid.uuid4().__str__().split('-')[-1]}"
-        while User.objects.filter(username=username).exists():
-            username = f"{username}{randint(1, 9)}"
-        password = f"password-{uuid.uuid4().__str__().split('-')[-1]}"
+        """
+        Creates the user with its first confirmation, without a password
+        until EnterFieldsSerializer sets one. The phone is unique (checked by
+        the field's validator), the username random. The code is mailed once
+        the surrounding transaction commits.
+        """
         phone = validated_data.get('phone')
-        user = User.objects.filter(phone=phone)
-        if user.exists():
-            user = user.first()
-        else:
-            user = User.objects.create(username=username, phone=phone)
-            user.set_password(password)
-            user.save()
+        user = User(username=f"username-{uuid.uuid4().hex}", phone=phone)
+        user.set_unusable_password()
+        user.save()
         confirmation = Confirmation.objects.create(user=user, phone=phone)
-        code = confirmation.code
-        send_email(phone, code)
+        transaction.on_commit(partial(send_email, phone, confirmation.code))
         return user
 
 
@@ -122,7 +113,7 @@ class EnterFieldsSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         instance.username = validated_data.get('username', instance.username)
-        instance.set_password(validated_data.get('password'))
+        set_password(instance, validated_data.get('password'))
         instance.auth_status = 'registered'
         instance.save()
         return instance
@@ -158,6 +149,8 @@ class LoginSerializer(TokenObtainPairSerializer):
 
 
 class LoginRefreshSerializer(TokenRefreshSerializer):
+    token_class = RefreshToken
+
     def validate(self, attr):
         data = super(LoginRefreshSerializer, self).validate(attr)
         access_token_instance = AccessToken(data['access'])
@@ -208,6 +201,6 @@ class ResetPasswordSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         password = validated_data.get('password')
-        instance.set_password(password)
+        set_password(instance, password)
         instance.save()
         return instance
@@ -1,3 +1,34 @@
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from apps.users.models import Confirmation, User
+from shared.throttling import get_store
+from shared.utils import send_email
+
+
+class SignUpQueryCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_store().buckets.clear()
+        self.client = APIClient()
+
+    def test_sign_up(self):
+        # phone unique check + savepoint + INSERT user + INSERT confirmation
+        # + INSERT outstanding token + release
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(6):
+            response = self.client.post('/users/sign-up/', {'phone': '+998901234567'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data['data'])
+        user = User.objects.get(phone='+998901234567')
+        self.assertFalse(user.has_usable_password())
+        self.assertTrue(Confirmation.objects.filter(user=user, is_confirmed=False).exists())
+        # the code is mailed after the commit
+        self.assertIn(send_email, [getattr(callback, 'func', None) for callback in callbacks])
+
+    def test_sign_up_existing_phone(self):
+        User.objects.create(username='owner', phone='+998901234567')
+        with self.assertNumQueries(1):
+            response = self.client.post('/users/sign-up/', {'phone': '+998901234567'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Confirmation.objects.exists())
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+
+class RevokedTokens:
+    """
+    In-process copy of the blacklisted token ids (JTIs). It is loaded from
+    the database on first use and reloaded every USERS_REVOKED_RELOAD_INTERVAL
+    seconds, which drops expired tokens. In between, tokens blacklisted by
+    other processes are picked up at most USERS_REVOKED_SYNC_INTERVAL seconds
+    later, with a query over the newest blacklist rows only.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jtis = set()
+        # Blacklist rows are read from after the max id seen one sync earlier:
+        # a row can commit after rows with higher ids were already read
+        self.last_id = self.checked_id = None
+        self.synced_at = self.loaded_at = 0
+
+    def sync(self):
+        now = time.monotonic()
+        with self.lock:
+            reload = self.last_id is None or now - self.loaded_at >= settings.USERS_REVOKED_RELOAD_INTERVAL
+            if reload:
+                rows = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+                jtis, last_id = set(), 0
+                self.loaded_at = now
+            elif now - self.synced_at >= settings.USERS_REVOKED_SYNC_INTERVAL:
+                rows = BlacklistedToken.objects.filter(id__gt=self.checked_id)
+                jtis, last_id = self.jtis, self.last_id
+            else:
+                return
+            for pk, jti in rows.values_list('id', 'token__jti'):
+                jtis.add(jti)
+                last_id = max(last_id, pk)
+            self.checked_id = last_id if reload else self.last_id
+            self.jtis, self.last_id, self.synced_at = jtis, last_id, now
+
+    def add(self, jti):
+        with self.lock:
+            self.jtis.add(jti)
+
+    def __contains__(self, jti):
+        self.sync()
+        return jti in self.jtis
+
+
+revoked_tokens = RevokedTokens()
+
+
+class RefreshToken(BaseRefreshToken):
+    """
+    Refresh token checked against ``revoked_tokens`` instead of a blacklist
+    query on every refresh.
+    """
+
+    def check_blacklist(self):
+        if self.payload[api_settings.JTI_CLAIM] in revoked_tokens:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        revoked_tokens.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
@@ -1,5 +1,6 @@
 from django.urls import path
 
+from .async_views import AsyncLoginView, AsyncResetPasswordView
 from .views import SignUpApiView, VerifyCodeApiView, NewVerificationApiView, EnterFieldsApiView, LoginApiView, \
     LoginRefreshApiView, LogOutApiView, ForgotPasswordApiView, ResetPasswordApiView
 
@@ -15,4 +16,8 @@ urlpatterns = [
     path('log-out/', LogOutApiView.as_view(), name='log_out'),
     path('forgot-password/', ForgotPasswordApiView.as_view(), name='forgot_password'),
     path('reset-password/', ResetPasswordApiView.as_view(), name='reset_password'),
+
+    # async variants for the ASGI entry point
+    path('async/login/', AsyncLoginView.as_view(), name='async_login'),
+    path('async/reset-password/', AsyncResetPasswordView.as_view(), name='async_reset_password'),
 ]
@@ -1,6 +1,7 @@
 from datetime import datetime
 
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.db.models import Q
 from django.shortcuts import render
 from rest_framework import status
@@ -10,27 +11,30 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.exceptions import TokenError
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from shared.throttling import IPThrottle, IdentityThrottle
 from shared.utils import send_email
 from apps.users.models import User, Confirmation
 from apps.users.serializers import SignUpByPhone, EnterFieldsSerializer, LoginSerializer, LoginRefreshSerializer, \
     LogOutSerializer, ForgotPasswordSerializer, ResetPasswordSerializer
+from apps.users.tokens import RefreshToken
 
 
 class SignUpApiView(APIView):
     permission_classes = (AllowAny,)
+    throttle_classes = (IPThrottle, IdentityThrottle)
+    throttle_scope = 'sign_up'
+    throttle_identity_field = 'phone'
 
     def post(self, request):
         data = request.data
-        phone = data.get('phone')
         serializer = SignUpByPhone(data=data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        user = User.objects.get(phone=phone)
+        with transaction.atomic():
+            user = serializer.save()
+            refresh = RefreshToken.for_user(user=user)
         response = serializer.validated_data
-        refresh = RefreshToken.for_user(user=user)
         response['access'] = str(refresh.access_token)
         response['refresh'] = str(refresh)
 
@@ -49,15 +53,14 @@ class VerifyCodeApiView(APIView):
         data = request.data
         code = data.get('code')
         user = request.user
-        confirmations = Confirmation.objects.filter(
-            Q(code=code) & Q(is_confirmed=False) & Q(time_limit__gt=datetime.now()) & Q(user=user))
-        if confirmations.exists():
+        # Checks and confirms the code in one statement, so it can't be used twice
+        confirmed = Confirmation.objects.filter(
+            Q(code=code) & Q(is_confirmed=False) & Q(time_limit__gt=datetime.now()) & Q(user=user)
+        ).update(is_confirmed=True)
+        if confirmed:
             user.auth_status = 'code'
-            user.save()
+            user.save(update_fields=['auth_status'])
             refresh = RefreshToken.for_user(user)
-            verification = confirmations.first()
-            verification.is_confirmed = True
-            verification.save()
             return Response(
                 {
                     'success': True,
@@ -80,6 +83,8 @@ class VerifyCodeApiView(APIView):
 
 class NewVerificationApiView(APIView):
     permission_classes = (IsAuthenticated,)
+    throttle_classes = (IPThrottle, IdentityThrottle)
+    throttle_scope = 'new_verification'
 
     def get(self, request):
         user = request.user
@@ -125,6 +130,9 @@ class EnterFieldsApiView(APIView):
 
 class LoginApiView(TokenObtainPairView):
     serializer_class = LoginSerializer
+    throttle_classes = (IPThrottle, IdentityThrottle)
+    throttle_scope = 'login'
+    throttle_identity_field = 'username'
 
 
 class LoginRefreshApiView(TokenRefreshView):
@@ -161,6 +169,9 @@ class LogOutApiView(APIView):
 
 class ForgotPasswordApiView(APIView):
     permission_classes = (AllowAny,)
+    throttle_classes = (IPThrottle, IdentityThrottle)
+    throttle_scope = 'forgot_password'
+    throttle_identity_field = 'phone'
 
     def post(self, request):
         data = request.data
@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # installed apps
     'drf_yasg',
@@ -107,9 +108,35 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication'
+        'apps.users.authentication.CachedJWTAuthentication',
     ],
+    'EXCEPTION_HANDLER': 'shared.views.exception_handler',
+    # Reverse proxies in front of the app. Throttles key clients by the address
+    # the last of them saw; with 0 it is REMOTE_ADDR and X-Forwarded-For, which
+    # the client controls, is ignored
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
+    # orjson based, they fall back to the stdlib json when it isn't installed
+    'DEFAULT_RENDERER_CLASSES': [
+        'shared.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'shared.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # "<throttle_scope>_<kind>" rates of shared.throttling, per client IP and
+    # per phone/username/user
+    'DEFAULT_THROTTLE_RATES': {
+        'sign_up_ip': '10/min',
+        'sign_up_identity': '3/min',
+        'new_verification_ip': '10/min',
+        'new_verification_identity': '3/min',
+        'forgot_password_ip': '10/min',
+        'forgot_password_identity': '3/min',
+        'login_ip': '30/min',
+        'login_identity': '10/min',
+    },
 }
 
 ROOT_URLCONF = 'config.urls'
@@ -118,7 +145,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -126,6 +152,14 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Templates are compiled once per process (what APP_DIRS does
+            # implicitly, spelled out)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -157,6 +191,58 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# In-process LRU cache locally, a shared Redis cache in production
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'todowoo',
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int),
+        },
+    }
+}
+
+if config('REDIS_URL', default=''):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('REDIS_URL'),
+    }
+
+TODO_CACHE_ALIAS = 'default'
+# How long task responses are cached, 0 turns it off. Like the user cache it
+# needs a cache shared by all processes, a write only bumps the version in
+# TODO_CACHE_ALIAS (see apps.todo.checks)
+TODO_CACHE_TIMEOUT = config('TODO_CACHE_TIMEOUT', default=300 if config('REDIS_URL', default='') else 0, cast=int)
+
+TODO_BULK_MAX_BATCH_SIZE = config('TODO_BULK_MAX_BATCH_SIZE', default=500, cast=int)
+
+TODO_SYNC_SAFETY_MARGIN = 5
+TODO_TOMBSTONE_RETENTION_DAYS = config('TODO_TOMBSTONE_RETENTION_DAYS', default=30, cast=int)
+
+TODO_EXPORT_CHUNK_SIZE = 2000
+TODO_IMPORT_BATCH_SIZE = 1000
+
+USERS_CACHE_ALIAS = 'default'
+# How long an authenticated user can be served from the cache without a query,
+# 0 turns it off. It needs a cache shared by all processes: saving a user only
+# drops the copy from USERS_CACHE_ALIAS, so with a per-process cache the other
+# workers would keep a deactivated user (see apps.users.checks)
+USERS_AUTH_CACHE_TIMEOUT = config('USERS_AUTH_CACHE_TIMEOUT', default=60 if config('REDIS_URL', default='') else 0,
+                                  cast=int)
+# Blacklisted refresh tokens are checked in memory, see apps.users.tokens
+USERS_REVOKED_SYNC_INTERVAL = config('USERS_REVOKED_SYNC_INTERVAL', default=5, cast=int)
+USERS_REVOKED_RELOAD_INTERVAL = 3600
+
+# Token buckets of shared.throttling: per process by default,
+# shared.throttling.CacheBucketStore shares them through THROTTLE_CACHE_ALIAS
+THROTTLE_STORE = config('THROTTLE_STORE', default='shared.throttling.MemoryBucketStore')
+THROTTLE_CACHE_ALIAS = 'default'
+THROTTLE_MAX_ENTRIES = 100000
+THROTTLE_SWEEP_INTERVAL = 60
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -208,4 +294,19 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'users.User'
 
+AUTHENTICATION_BACKENDS = ['apps.users.backends.CachedModelBackend']
+
+# Password hashing pool and verified credentials cache, see shared.hashing
+HASHING_WORKERS = config('HASHING_WORKERS', default=2, cast=int)
+HASHING_MAX_PENDING = config('HASHING_MAX_PENDING', default=32, cast=int)
+PASSWORD_CACHE_SIZE = 10000
+PASSWORD_CACHE_TIMEOUT = config('PASSWORD_CACHE_TIMEOUT', default=300, cast=int)
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Outgoing mail queue, see shared.utils.EmailQueue
+EMAIL_QUEUE_SIZE = config('EMAIL_QUEUE_SIZE', default=1000, cast=int)
+EMAIL_QUEUE_WORKERS = config('EMAIL_QUEUE_WORKERS', default=4, cast=int)
+EMAIL_QUEUE_BATCH_SIZE = 50
+EMAIL_QUEUE_IDLE_TIMEOUT = 30
+EMAIL_QUEUE_DRAIN_TIMEOUT = 10
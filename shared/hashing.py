@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+# Password hashing (PBKDF2 by default) runs in a dedicated pool of
+# HASHING_WORKERS threads, hashlib releases the GIL while it hashes. At most
+# HASHING_MAX_PENDING hashes are running or waiting, more are refused with a
+# 503 right away, so a login storm can't hold every request worker.
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many password checks in progress, try again shortly.'
+    default_code = 'hashing_busy'
+    # seconds, sent as Retry-After
+    retry_after = 1
+
+
+class HashingPool:
+
+    def __init__(self, workers, max_pending):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hashing')
+        self.slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def run(self, fn, *args):
+        return self.submit(fn, *args).result()
+
+    async def arun(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+
+@lru_cache(maxsize=None)
+def get_pool():
+    return HashingPool(settings.HASHING_WORKERS, settings.HASHING_MAX_PENDING)
+
+
+class VerifiedCredentials:
+    """
+    Passwords recently checked against a user's password hash, so repeated
+    logins skip the hashing. Entries are HMACs of the stored hash and the raw
+    password, so the cache never holds a password, and changing the password
+    (or rehashing it with other parameters) makes the old entries unusable.
+    Bounded to PASSWORD_CACHE_SIZE entries, each valid PASSWORD_CACHE_TIMEOUT
+    seconds.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    @staticmethod
+    def get_key(encoded, password):
+        message = f'{encoded}\0{password}'.encode()
+        return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).digest()
+
+    def contains(self, encoded, password):
+        key = self.get_key(encoded, password)
+        with self.lock:
+            expires = self.entries.get(key)
+            if expires is None:
+                return False
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return False
+            self.entries.move_to_end(key)
+            return True
+
+    def add(self, encoded, password):
+        key = self.get_key(encoded, password)
+        with self.lock:
+            self.entries[key] = time.monotonic() + settings.PASSWORD_CACHE_TIMEOUT
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.PASSWORD_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+
+verified_credentials = VerifiedCredentials()
+
+
+def must_update(encoded):
+    try:
+        return identify_hasher(encoded).must_update(encoded)
+    except ValueError:
+        return False
+
+
+def verify_password(user, password):
+    """
+    user.check_password() with the hashing done in the pool and the result
+    cached. A hash made with outdated parameters is upgraded like
+    check_password() does.
+    """
+    encoded = user.password
+    if password is None or not user.has_usable_password():
+        return False
+    if verified_credentials.contains(encoded, password):
+        return True
+    if not get_pool().run(check_password, password, encoded):
+        return False
+    if must_update(encoded):
+        rehash_password(user, password)
+        user.save(update_fields=['password'])
+    verified_credentials.add(user.password, password)
+    return True
+
+
+async def averify_password(user, password):
+    encoded = user.password
+    if password is None or not user.has_usable_password():
+        return False
+    if verified_credentials.contains(encoded, password):
+        return True
+    if not await get_pool().arun(check_password, password, encoded):
+        return False
+    if must_update(encoded):
+        await arehash_password(user, password)
+        await user.asave(update_fields=['password'])
+    verified_credentials.add(user.password, password)
+    return True
+
+
+def set_password(user, password):
+    """
+    user.set_password() with the hashing done in the pool.
+    """
+    user.password = get_pool().run(make_password, password)
+    # lets the password validators' password_changed() run on save
+    user._password = password
+
+
+async def aset_password(user, password):
+    user.password = await get_pool().arun(make_password, password)
+    user._password = password
+
+
+def rehash_password(user, password):
+    """
+    Hashes the unchanged password with the current parameters. Unlike
+    set_password() it isn't a password change, so the validators'
+    password_changed() doesn't run on save, as with check_password().
+    """
+    user.password = get_pool().run(make_password, password)
+
+
+async def arehash_password(user, password):
+    user.password = await get_pool().arun(make_password, password)
+
+
+def hash_dummy_password(password):
+    """
+    Hashes like a password check would, for unknown users, so their login
+    takes as long as a wrong password.
+    """
+    get_pool().run(make_password, password)
+
+
+async def ahash_dummy_password(password):
+    await get_pool().arun(make_password, password)
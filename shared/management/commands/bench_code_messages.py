@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from shared.utils import CODE_TEMPLATE, get_code_template_parts, render_code_message
+
+
+class Command(BaseCommand):
+    help = 'Measures verification-code messages rendered per second, with render_to_string and the fast path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        codes = [f'{i % 100000:05d}' for i in range(count)]
+        if settings.DEBUG or get_code_template_parts() is None:
+            self.stderr.write(self.style.WARNING('No fast path (DEBUG or the template), both runs render the template'))
+        for code in codes[:100]:
+            if render_code_message(code) != render_to_string(CODE_TEMPLATE, {'code': code}):
+                self.stderr.write(self.style.WARNING(f'The fast path differs from render_to_string for {code}'))
+                break
+        for name, render in (
+                ('render_to_string', lambda code: render_to_string(CODE_TEMPLATE, {'code': code})),
+                ('render_code_message', render_code_message),
+        ):
+            start = time.perf_counter()
+            for code in codes:
+                render(code)
+            seconds = time.perf_counter() - start
+            self.stdout.write(f'{name}: {count / seconds:,.0f} messages/s')
@@ -0,0 +1,46 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.models import User
+from shared.hashing import verified_credentials, verify_password
+
+PASSWORD = 'Bench-password-123'
+
+
+class Command(BaseCommand):
+    help = 'Measures password checks per second through shared.hashing, with and without the credentials cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=16, help='password checks that hash')
+        parser.add_argument('--cached-count', type=int, default=5000, help='password checks served from the cache')
+        parser.add_argument('--threads', type=int, default=1, help='concurrent request threads')
+
+    def handle(self, *args, **options):
+        # an unsaved user with a current hash, so nothing is rehashed or written
+        user = User(username='bench', password=make_password(PASSWORD))
+        threads = options['threads']
+
+        def login(cached):
+            if not cached:
+                verified_credentials.entries.clear()
+            if not verify_password(user, PASSWORD):
+                raise CommandError('The password check failed')
+
+        for cached, count in ((False, options['count']), (True, options['cached_count'])):
+            verified_credentials.entries.clear()
+            if cached:
+                login(False)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                list(executor.map(lambda _: login(cached), range(count)))
+            rate = count / (time.perf_counter() - start)
+            cores = min(threads, settings.HASHING_WORKERS, os.cpu_count() or 1)
+            self.stdout.write(
+                f"{'cached' if cached else 'hashed'}: {rate:,.1f} logins/s with {threads} request threads"
+                + ('' if cached else f', {rate / cores:,.1f}/s per hashing core')
+            )
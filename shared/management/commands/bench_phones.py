@@ -0,0 +1,56 @@
+import random
+import subprocess
+import sys
+import time
+
+import phonenumbers
+from django.core.management.base import BaseCommand, CommandError
+
+from shared.utils import check_phone, parse_phone
+
+EDGE_CASES = (
+    '', '+', '+998', '998901234567', '+99890123456', '+9989012345678', '+998901234567\n', ' +998901234567',
+    '+998 90 123 45 67', '+998-90-123-45-67', '+998000000000', '+998331234567', '+998771234567',
+    '+998٩٠١٢٣٤٥٦٧', '+79161234567', '+14155552671', '+998abcdefghi',
+)
+
+
+def reference(phone):
+    try:
+        return phonenumbers.is_valid_number(phonenumbers.parse(phone))
+    except phonenumbers.NumberParseException:
+        return False
+
+
+def random_phones(count, seed=0):
+    rng = random.Random(seed)
+    return [f'+998{rng.randrange(10 ** 9):09d}' for _ in range(count)]
+
+
+class Command(BaseCommand):
+    help = 'Checks check_phone against phonenumbers and measures validations per second and the import time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=350000, help='random +998 numbers to compare')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        phones = random_phones(options['count'], options['seed'])
+        mismatches = [phone for phone in (*EDGE_CASES, *phones) if check_phone(phone) != reference(phone)]
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} numbers differ from phonenumbers, e.g. {mismatches[:5]!r}')
+        self.stdout.write(self.style.SUCCESS(f'{len(EDGE_CASES) + len(phones)} numbers match phonenumbers'))
+
+        sample = phones[:50000]
+        for name, validate in (('phonenumbers', reference), ('check_phone', check_phone)):
+            parse_phone.cache_clear()
+            start = time.perf_counter()
+            for phone in sample:
+                validate(phone)
+            self.stdout.write(f'{name}: {len(sample) / (time.perf_counter() - start):,.0f} validations/s')
+
+        # in fresh interpreters, shared.utils no longer imports phonenumbers
+        for module in ('phonenumbers', 'shared.utils'):
+            code = f'import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)'
+            output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+            self.stdout.write(f'import {module}: {float(output.stdout) * 1000:.0f}ms')
@@ -0,0 +1,42 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.todo.models import Task
+from apps.todo.serializers import TaskSerializer
+from apps.users.models import User
+from shared.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Times JSONRenderer against ORJSONRenderer on TaskSerializer payloads, without touching the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+        parser.add_argument('--number', type=int, default=50, help='renders per timing')
+
+    def handle(self, *args, **options):
+        author = User(id=1, username='author', first_name='Bench', last_name='Mark', phone='+998901234567')
+        now = timezone.now()
+        for size in options['sizes']:
+            tasks = [
+                Task(id=i, title=f'Task {i}', memo='memo ' * 20, author=author, important=i % 3 == 0,
+                     is_completed=i % 2 == 0, created_time=now, updated_time=now, completed_time=now)
+                for i in range(size)
+            ]
+            data = TaskSerializer(tasks, many=True).data
+            expected = JSONRenderer().render(data)
+            if ORJSONRenderer().render(data) != expected:
+                self.stderr.write(self.style.WARNING(f'{size} rows: the renderers disagree'))
+            timings = []
+            for renderer_class in (JSONRenderer, ORJSONRenderer):
+                renderer = renderer_class()
+                seconds = min(timeit.repeat(lambda: renderer.render(data), number=options['number'], repeat=3))
+                timings.append(seconds / options['number'])
+            stdlib, orjson = timings
+            self.stdout.write(
+                f'{size} rows ({len(expected)} bytes): JSONRenderer {stdlib * 1e6:.0f}us, '
+                f'ORJSONRenderer {orjson * 1e6:.0f}us ({stdlib / orjson:.1f}x)'
+            )
@@ -1,3 +1,4 @@
+from django.core.paginator import Paginator
 from rest_framework import pagination
 from rest_framework.response import Response
 
@@ -7,12 +8,74 @@ class CustomPagination(pagination.PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
+    def __init__(self, count=None, with_count=True):
+        # A known count (e.g. a maintained counter) saves the COUNT(*) query
+        self.count = count
+        self.with_count = with_count
+
+    def django_paginator_class(self, object_list, per_page):
+        paginator = Paginator(object_list, per_page)
+        if self.count is not None:
+            paginator.count = self.count
+        return paginator
+
     def get_paginated_response(self, data):
-        return Response({
+        response = {
             'links': {
                 'next': self.get_next_link(),
                 'previous': self.get_previous_link()
             },
             'count': self.page.paginator.count,
             'results': data
-        })
\ No newline at end of file
+        }
+        if not self.with_count:
+            response.pop('count')
+        return Response(response)
+
+
+class CustomCursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination over (created_time, id): no COUNT(*) and no OFFSET scan,
+    so every page costs the same as the first one.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('created_time', 'id')
+
+    def __init__(self, count=None, with_count=True):
+        # Only a known count is sent, cursor pages never count rows themselves
+        self.count = count
+        self.with_count = with_count
+
+    def get_paginated_response(self, data):
+        response = {
+            'links': {
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link()
+            },
+            'results': data
+        }
+        if self.with_count and self.count is not None:
+            response['count'] = self.count
+        return Response(response)
+
+
+class RankedCursorPagination(CustomCursorPagination):
+    """
+    Cursor pagination for querysets annotated with a relevance ``rank``.
+    """
+    ordering = ('-rank', '-id')
+
+
+def get_pagination(request, count=None):
+    """
+    Cursor mode is selected with ``?pagination=cursor`` (kept in the next/previous
+    links) or by sending a cursor token, page number mode stays the default.
+    ``?count=false`` leaves the count out of the response.
+    """
+    params = request.query_params
+    with_count = params.get('count') != 'false'
+    if params.get('pagination') == 'cursor' or CustomCursorPagination.cursor_query_param in params:
+        return CustomCursorPagination(count=count, with_count=with_count)
+    return CustomPagination(count=count, with_count=with_count)
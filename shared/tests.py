@@ -1,3 +1,42 @@
-from django.test import TestCase
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from shared.management.commands.bench_phones import EDGE_CASES, random_phones, reference
+from shared.throttling import IPThrottle, get_store
+from shared.utils import check_phone
+
+
+class CheckPhoneTest(SimpleTestCase):
+    def test_matches_phonenumbers(self):
+        # manage.py bench_phones runs the same comparison on 350k numbers
+        for phone in (*EDGE_CASES, *random_phones(20000)):
+            self.assertEqual(check_phone(phone), reference(phone), phone)
+
+
+class IPThrottleTest(SimpleTestCase):
+    def setUp(self):
+        get_store.cache_clear()
+        self.addCleanup(get_store.cache_clear)
+        self.factory = APIRequestFactory()
+        self.view = SimpleNamespace(throttle_scope='test')
+
+    def allowed(self, **headers):
+        return IPThrottle().allow_request(self.factory.post('/', REMOTE_ADDR='10.0.0.1', **headers), self.view)
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        rates = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 0, 'DEFAULT_THROTTLE_RATES': {'test_ip': '2/min'}}
+        with override_settings(REST_FRAMEWORK=rates):
+            results = [self.allowed(HTTP_X_FORWARDED_FOR=f'203.0.113.{i}') for i in range(4)]
+        self.assertEqual(results, [True, True, False, False])
+
+    def test_spoofed_forwarded_for_behind_a_proxy(self):
+        # the proxy appends the address it saw, anything before it is the client's
+        rates = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1, 'DEFAULT_THROTTLE_RATES': {'test_ip': '2/min'}}
+        with override_settings(REST_FRAMEWORK=rates):
+            results = [self.allowed(HTTP_X_FORWARDED_FOR=f'203.0.113.{i}, 198.51.100.7') for i in range(4)]
+            other = self.allowed(HTTP_X_FORWARDED_FOR='198.51.100.8')
+        self.assertEqual(results, [True, True, False, False])
+        self.assertTrue(other)
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+# Token-bucket throttling. A view sets ``throttle_scope`` and lists the
+# throttles it wants, each one is limited by the rate named
+# "<scope>_<kind>" in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']. "5/min" is a
+# bucket of 5 requests refilled at 5 per minute, so a client can burst up to
+# the limit and then gets one request per refill interval. Throttles run
+# before the handler, so a rejected request never reaches the database.
+
+
+class MemoryBucketStore:
+    """
+    Buckets of this process. A bucket that has refilled is the same as no
+    bucket, so it is dropped by a sweep every THROTTLE_SWEEP_INTERVAL seconds;
+    beyond THROTTLE_MAX_ENTRIES the least recently used ones go first.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> (tokens, updated, full_at)
+        self.buckets = OrderedDict()
+        self.swept_at = time.monotonic()
+
+    def consume(self, key, capacity, rate):
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated, _ = self.buckets.pop(key, (capacity, now, now))
+            allowed, tokens, wait = take(tokens + (now - updated) * rate, capacity, rate)
+            self.buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            if now - self.swept_at >= settings.THROTTLE_SWEEP_INTERVAL:
+                self.sweep(now)
+            while len(self.buckets) > settings.THROTTLE_MAX_ENTRIES:
+                self.buckets.popitem(last=False)
+        return allowed, wait
+
+    def sweep(self, now):
+        for key in [key for key, (_, _, full_at) in self.buckets.items() if full_at <= now]:
+            del self.buckets[key]
+        self.swept_at = now
+
+
+class CacheBucketStore:
+    """
+    Buckets in the THROTTLE_CACHE_ALIAS cache, shared by all processes. The
+    read and write aren't atomic, so concurrent requests of one client can
+    get slightly more than the rate.
+    """
+
+    def consume(self, key, capacity, rate):
+        cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        key = f'throttle:{key}'
+        now = time.time()
+        tokens, updated = cache.get(key, (capacity, now))
+        allowed, tokens, wait = take(tokens + max(now - updated, 0) * rate, capacity, rate)
+        cache.set(key, (tokens, now), timeout=int((capacity - tokens) / rate) + 1)
+        return allowed, wait
+
+
+def take(tokens, capacity, rate):
+    """
+    Takes a token from a bucket holding ``tokens``, returns whether there was
+    one, the tokens left and the seconds until the next one.
+    """
+    tokens = min(tokens, capacity)
+    if tokens >= 1:
+        return True, tokens - 1, 0
+    return False, tokens, (1 - tokens) / rate
+
+
+@lru_cache(maxsize=None)
+def get_store():
+    return import_string(settings.THROTTLE_STORE)()
+
+
+def consume(scope, kind, key):
+    """
+    Takes a token from the ``key`` bucket of the "<scope>_<kind>" rate, for
+    views outside DRF. Returns whether the request is allowed and the
+    seconds to wait otherwise.
+    """
+    rate = api_settings.DEFAULT_THROTTLE_RATES.get(f'{scope}_{kind}')
+    if rate is None:
+        return True, 0
+    num, period = rate.split('/')
+    duration = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+    return get_store().consume(f'{scope}:{kind}:{key}', int(num), int(num) / duration)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    kind = None
+
+    def __init__(self):
+        self.wait_time = None
+
+    def get_key(self, request, view):
+        """
+        The client the bucket belongs to, None to not throttle the request.
+        """
+        raise NotImplementedError('.get_key() must be overridden')
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if api_settings.DEFAULT_THROTTLE_RATES.get(f'{scope}_{self.kind}') is None:
+            return True
+        key = self.get_key(request, view)
+        if key is None:
+            return True
+        allowed, self.wait_time = consume(scope, self.kind, key)
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+class IPThrottle(TokenBucketThrottle):
+    kind = 'ip'
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+
+class IdentityThrottle(TokenBucketThrottle):
+    """
+    Keyed by the view's ``throttle_identity_field`` from the request data
+    (e.g. the phone), or the authenticated user.
+    """
+    kind = 'identity'
+
+    def get_key(self, request, view):
+        field = getattr(view, 'throttle_identity_field', None)
+        # the body can be any JSON value, the serializer reports that later
+        value = request.data.get(field) if field and isinstance(request.data, Mapping) else None
+        if isinstance(value, str) and value.strip():
+            return value.strip().lower()
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return None
@@ -1,14 +1,41 @@
+import atexit
+import logging
+import queue
 import re
 import threading
+import time
+from functools import lru_cache
 
-import phonenumbers
-from django.core.mail import EmailMessage
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
 from django.template.loader import render_to_string
+from django.utils.html import conditional_escape
+
+logger = logging.getLogger(__name__)
 
 regex_phone = re.compile(r'^[+]998([0-9][012345789]|[0-9][125679]|7[01234569])[0-9]{7}$')
 
+# phonenumbers loads its metadata on import, so it is only imported on the
+# first validation
+
+
+@lru_cache(maxsize=None)
+def get_uz_number_pattern():
+    """
+    Uzbek national numbers phonenumbers considers valid (fixed line or
+    mobile), as one regex built from its metadata.
+    """
+    from phonenumbers.phonemetadata import PhoneMetadata
+
+    metadata = PhoneMetadata.metadata_for_region('UZ')
+    types = '|'.join(desc.national_number_pattern for desc in (metadata.fixed_line, metadata.mobile))
+    return re.compile(f'(?=(?:{metadata.general_desc.national_number_pattern})\\Z)(?:{types})')
+
+
+@lru_cache(maxsize=4096)
+def parse_phone(phone):
+    import phonenumbers
 
-def check_phone(phone):
     try:
         parse_number = phonenumbers.parse(phone)
         return phonenumbers.is_valid_number(parse_number)
@@ -17,13 +44,138 @@ def check_phone(phone):
         return False
 
 
-class EmailThread(threading.Thread):
-    def __init__(self, email):
-        self.email = email
-        threading.Thread.__init__(self)
+def check_phone(phone):
+    """
+    Same result as phonenumbers.is_valid_number(phonenumbers.parse(phone)).
+    Plain +998 numbers are checked against the Uzbek patterns directly,
+    anything else goes through phonenumbers, with the results memoized.
+    """
+    if regex_phone.fullmatch(phone):
+        return get_uz_number_pattern().fullmatch(phone[4:]) is not None
+    return parse_phone(phone)
+
+
+class EmailQueue:
+    """
+    Bounded queue of outgoing mail, delivered by EMAIL_QUEUE_WORKERS threads.
+    Each worker keeps its backend connection open while there is mail and
+    sends up to EMAIL_QUEUE_BATCH_SIZE queued messages per send_messages()
+    call. When the queue is full the message is sent by the caller instead,
+    which slows a burst down rather than piling up mail in memory.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queue = None
+        self.workers = []
+        self.stats = {'queued': 0, 'sent': 0, 'failed': 0, 'inline': 0, 'latency_total': 0.0, 'latency_max': 0.0}
 
-    def run(self):
-        self.email.send()
+    def start(self):
+        with self.lock:
+            if self.queue is None:
+                self.queue = queue.Queue(maxsize=settings.EMAIL_QUEUE_SIZE)
+                for i in range(settings.EMAIL_QUEUE_WORKERS):
+                    worker = threading.Thread(target=self.work, args=(self.queue,), name=f'email-worker-{i}',
+                                              daemon=True)
+                    worker.start()
+                    self.workers.append(worker)
+                atexit.register(self.drain)
+            return self.queue
+
+    def put(self, message):
+        mail_queue = self.start()
+        try:
+            mail_queue.put_nowait((time.monotonic(), message))
+        except queue.Full:
+            connection = get_connection()
+            try:
+                self.record(self.send([(time.monotonic(), message)], connection), inline=True)
+            finally:
+                connection.close()
+            return
+        with self.lock:
+            self.stats['queued'] += 1
+
+    def work(self, mail_queue):
+        connection = get_connection()
+        while True:
+            try:
+                item = mail_queue.get(timeout=settings.EMAIL_QUEUE_IDLE_TIMEOUT)
+            except queue.Empty:
+                # don't hold an idle SMTP connection open
+                connection.close()
+                continue
+            if item is None:
+                connection.close()
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < settings.EMAIL_QUEUE_BATCH_SIZE:
+                try:
+                    item = mail_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self.record(self.send(batch, connection))
+            if stop:
+                connection.close()
+                return
+
+    @staticmethod
+    def send(batch, connection):
+        try:
+            connection.open()
+            sent = connection.send_messages([message for _, message in batch]) or 0
+        except Exception:
+            logger.exception('Sending %s emails failed', len(batch))
+            connection.close()
+            sent = 0
+        now = time.monotonic()
+        return sent, len(batch) - sent, [now - queued for queued, _ in batch]
+
+    def record(self, result, inline=False):
+        sent, failed, latencies = result
+        with self.lock:
+            self.stats['sent'] += sent
+            self.stats['failed'] += failed
+            self.stats['inline'] += inline
+            self.stats['latency_total'] += sum(latencies)
+            self.stats['latency_max'] = max(self.stats['latency_max'], *latencies)
+
+    def get_stats(self):
+        """
+        Counters since start, the current queue depth and the latency in
+        seconds from queueing to the backend accepting the mail.
+        """
+        with self.lock:
+            stats = dict(self.stats)
+        done = stats['sent'] + stats['failed']
+        stats['depth'] = self.queue.qsize() if self.queue is not None else 0
+        stats['latency_avg'] = stats.pop('latency_total') / done if done else 0.0
+        return stats
+
+    def drain(self, timeout=None):
+        """
+        Stops the workers once the mail queued so far is sent, waiting up to
+        ``timeout`` seconds (EMAIL_QUEUE_DRAIN_TIMEOUT by default). Called on
+        interpreter exit.
+        """
+        with self.lock:
+            workers, self.workers = self.workers, []
+            if self.queue is None:
+                return
+            mail_queue, self.queue = self.queue, None
+        for _ in workers:
+            mail_queue.put(None)
+        deadline = time.monotonic() + (settings.EMAIL_QUEUE_DRAIN_TIMEOUT if timeout is None else timeout)
+        for worker in workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+
+
+email_queue = EmailQueue()
 
 
 class Email:
@@ -36,14 +188,33 @@ class Email:
         )
         if data.get('content_type') == 'html':
             email.content_subtype = 'html'
-            EmailThread(email).start()
+        email_queue.put(email)
+
+
+CODE_TEMPLATE = 'phone/authentication/code.html'
+CODE_PLACEHOLDER = 'CODEPLACEHOLDER'
+
+
+@lru_cache(maxsize=None)
+def get_code_template_parts():
+    """
+    The code template rendered once around a placeholder, so a message is
+    just the parts joined around the escaped code. None when the template
+    doesn't output the code exactly once as is.
+    """
+    parts = render_to_string(CODE_TEMPLATE, {'code': CODE_PLACEHOLDER}).split(CODE_PLACEHOLDER)
+    return parts if len(parts) == 2 else None
+
+
+def render_code_message(code):
+    parts = None if settings.DEBUG else get_code_template_parts()
+    if parts is None:
+        return render_to_string(CODE_TEMPLATE, {'code': code})
+    return parts[0] + conditional_escape(code) + parts[1]
 
 
 def send_email(email, code):
-    html_content = render_to_string(
-        'phone/authentication/code.html',
-        {'code': code}
-    )
+    html_content = render_code_message(code)
     Email.send_email(
         {
             'subject': "Ro'yxatdan o'tish",
@@ -1,3 +1,13 @@
-from django.shortcuts import render
+from rest_framework.views import exception_handler as drf_exception_handler
 
-# Create your views here.
+from shared.hashing import HashingBusy
+
+
+def exception_handler(exc, context):
+    """
+    DRF's exception handler, plus Retry-After on HashingBusy responses.
+    """
+    response = drf_exception_handler(exc, context)
+    if response is not None and isinstance(exc, HashingBusy):
+        response['Retry-After'] = str(exc.retry_after)
+    return response